@@ -1,10 +1,63 @@
-from fastapi import File, UploadFile
-import pandas as pd
-from fastapi import FastAPI
+import csv
+import hmac
+import io
+import itertools
+import json
+import os
+import spacy
+from contextlib import asynccontextmanager
+from fastapi import File, Header, HTTPException, Response, UploadFile
+import time
+from pathlib import Path
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from src.predict import load_models, extract_and_label
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from src.batching import MicroBatcher
+from src.bulk import guess_format, iter_records
+from src.cache import ResultCache
+from src.metrics import METRICS
+from src.predict import PARAGRAPH_CACHE, extract_batch, extract_incremental
+from src.registry import ModelRegistry
 
-app = FastAPI()
+NER_MODEL_PATH = os.getenv("NER_MODEL_PATH", "./training/model-best")
+CLASSIFIER_PATH = os.getenv("CLASSIFIER_PATH", "./models/skill_classifier.joblib")
+MODEL_LOAD_TIMEOUT = float(os.getenv("MODEL_LOAD_TIMEOUT", "300"))
+# /models/reload is off unless MODEL_RELOAD_TOKEN is set; callers send it as
+# "Authorization: Bearer <token>" and may only load from MODEL_RELOAD_DIRS.
+MODEL_RELOAD_TOKEN = os.getenv("MODEL_RELOAD_TOKEN", "")
+MODEL_RELOAD_DIRS = [
+    Path(d).resolve() for d in (os.getenv("MODEL_RELOAD_DIRS", "./models,./training").split(",")) if d.strip()
+]
+# spaCy worker processes for /extract_batch. Server-side only: every
+# nlp.pipe(n_process>1) call starts a pool holding a copy of the model.
+BATCH_N_PROCESS = max(1, min(int(os.getenv("BATCH_N_PROCESS", "1")), os.cpu_count() or 1))
+
+
+def _env_list(name):
+    return [x.strip() for x in os.getenv(name, "").split(",") if x.strip()]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Bind the port right away; the model loads and warms up meanwhile
+    registry.load_in_background()
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+class TimedJSONResponse(JSONResponse):
+    # Attribute JSON serialization time to its own stage
+    def render(self, content):
+        with METRICS.stage("serialize"):
+            return super().render(content)
+
+
+# METRICS_ENABLED=1 turns on hot-path instrumentation exposed at /metrics
+METRICS.enabled = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,25 +67,238 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-nlp, clf = load_models("./training/model-best", "./models/skill_classifier.joblib")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so unknown URLs cannot create new series
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    METRICS.observe("skill_request_seconds", time.perf_counter() - start, path=path)
+    return response
+
+# Only wrap requests when metrics are on; the middleware is not free
+if METRICS.enabled:
+    app.middleware("http")(record_request_latency)
+
+# EXTRACTION_MODE: "ner" (default), "gazetteer" or "hybrid".
+# SPACY_EXCLUDE / SPACY_DISABLE: comma-separated components to trim.
+registry = ModelRegistry(
+    NER_MODEL_PATH, CLASSIFIER_PATH,
+    mode=os.getenv("EXTRACTION_MODE", "ner"),
+    exclude=_env_list("SPACY_EXCLUDE"),
+    disable=_env_list("SPACY_DISABLE"),
+)
+
+
+def current_model():
+    try:
+        return registry.get(timeout=MODEL_LOAD_TIMEOUT)
+    except (TimeoutError, RuntimeError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+def _batch_size(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = 0
+    if value < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be a positive integer")
+    return value
+
+def _documents(docs):
+    # A list of strings or of {"id": ..., "text": <str>} objects
+    if not isinstance(docs, list) or not all(
+        isinstance(d, str) or (isinstance(d, dict) and isinstance(d.get("text"), str)) for d in docs
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail='documents must be a list of strings or of objects with a string "text"',
+        )
+    return docs
+
+# Reposted/resubmitted descriptions are answered from a content-addressed
+# cache. RESULT_CACHE_SIZE=0 without RESULT_CACHE_PATH disables it.
+result_cache = ResultCache(
+    maxsize=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+    ttl=float(os.environ["RESULT_CACHE_TTL"]) if os.getenv("RESULT_CACHE_TTL") else None,
+    path=os.getenv("RESULT_CACHE_PATH") or None,
+    max_disk_entries=int(os.getenv("RESULT_CACHE_DISK_SIZE", "100000")),
+)
+
+
+def cached_extract_batch(texts, model, batch_size: int = 64, n_process: int = 1):
+    keys = [ResultCache.key(text, model.version) for text in texts]
+    results = [result_cache.get(key) for key in keys]
+
+    misses = [i for i, res in enumerate(results) if res is None]
+    if misses:
+        fresh = extract_batch(
+            [texts[i] for i in misses], model.nlp, model.clf,
+            batch_size=batch_size, n_process=n_process,
+        )
+        for i, res in zip(misses, fresh):
+            results[i] = res
+            result_cache.put(keys[i], res)
+    return results
+
+
+def run_micro_batch(texts):
+    model = current_model()
+    results = extract_batch(texts, model.nlp, model.clf, batch_size=len(texts))
+    return [(model.version, skills) for skills in results]
+
+
+# Concurrent /extract calls are coalesced and run through nlp.pipe together.
+# Raise BATCH_MAX_WAIT_MS for more throughput at peak, lower it for latency.
+batcher = MicroBatcher(
+    run_micro_batch,
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "5")),
+)
+
+
+
+def label_cache_stats():
+    # Span label cache of the model currently serving requests
+    model = registry.current
+    if model is None or model.label_cache is None:
+        return {}
+    return model.label_cache.stats()
+
+
+METRICS.register_gauge("skill_batch_queue_depth", batcher.qsize, "requests waiting for a micro-batch")
+METRICS.register_gauge("skill_result_cache", result_cache.stats, "whole-document result cache")
+METRICS.register_gauge("skill_span_label_cache", label_cache_stats, "span -> label cache")
+METRICS.register_gauge("skill_paragraph_cache", PARAGRAPH_CACHE.stats, "paragraph -> entities cache")
 
 @app.post("/extract")
-def extract_api(data: dict):
+async def extract_api(data: dict, response: Response):
     jd = data.get("text", "")
-    return extract_and_label(jd, nlp, clf)
+    version = (await run_in_threadpool(current_model)).version
+    # Cache lookups may hit sqlite, so keep them off the event loop
+    skills = await run_in_threadpool(result_cache.get, ResultCache.key(jd, version))
+    if skills is None:
+        version, skills = await batcher.submit(jd)
+        await run_in_threadpool(result_cache.put, ResultCache.key(jd, version), skills)
+    response.headers["X-Model-Version"] = version
+    return skills
+
+@app.post("/extract_batch")
+def extract_batch_api(data: dict, response: Response):
+    # Each document is either a plain string or {"id": ..., "text": ...}
+    docs = _documents(data.get("documents", []))
+    ids = [d.get("id", i) if isinstance(d, dict) else i for i, d in enumerate(docs)]
+    texts = [d["text"] if isinstance(d, dict) else d for d in docs]
+
+    batch_size = _batch_size(data.get("batch_size", 64))
+
+    model = current_model()
+    results = cached_extract_batch(texts, model, batch_size=batch_size, n_process=BATCH_N_PROCESS)
+    response.headers["X-Model-Version"] = model.version
+    return [{"id": doc_id, "skills": skills} for doc_id, skills in zip(ids, results)]
+
+@app.post("/extract_incremental")
+def extract_incremental_api(data: dict, response: Response):
+    # For edited postings: only paragraphs not seen before run through the model
+    model = current_model()
+    skills = extract_incremental(data.get("text", ""), model.nlp, model.clf, model.version)
+    response.headers["X-Model-Version"] = model.version
+    return skills
 
 @app.post("/extract_file")
-async def extract_from_file(file: UploadFile = File(...)):
-    content = await file.read()
-    text = content.decode("utf-8", errors="ignore")
+def extract_from_file(file: UploadFile = File(...), column: str = None, format: str = None,
+                      batch_size: int = 64):
+    """Stream one NDJSON line {"id", "skills"} per CSV row, JSONL line or text paragraph.
 
-    # Try reading as CSV first
+    The upload is decoded and parsed incrementally and rows go through the
+    pipeline `batch_size` at a time, so memory stays bounded by one batch.
+    `format` defaults to the file extension; `column` is the CSV column or
+    JSONL field holding the text. A row that cannot be parsed gets an
+    {"id", "error"} line instead and the rest of the file is still read.
+    """
+    fmt = format or guess_format(file.filename or "")
+    fh = io.TextIOWrapper(file.file, encoding="utf-8", errors="ignore", newline="")
     try:
-        df = pd.read_csv(pd.io.common.StringIO(text))
-        # If CSV, combine all columns into one text blob
-        text = " ".join(df.astype(str).values.flatten())
-    except Exception:
-        # If not CSV, treat entire content as raw text
-        pass
-
-    return extract_and_label(text, nlp, clf)
\ No newline at end of file
+        batches = spacy.util.minibatch(iter_records(fh, fmt, column, yield_errors=True), _batch_size(batch_size))
+        # Read the first batch up front so a bad column or format is a 400
+        first = next(batches, [])
+    except (ValueError, csv.Error) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    model = current_model()
+
+    def results():
+        batches_left = itertools.chain([first], batches)
+        while True:
+            try:
+                batch = next(batches_left)
+            except StopIteration:
+                return
+            except Exception as exc:
+                # Reading cannot continue; end the stream with an error line
+                # rather than silently truncating it
+                yield json.dumps({"id": None, "error": str(exc)}) + "\n"
+                return
+
+            # Unparsable rows come through as (id, exception)
+            texts = [text for _, text in batch if not isinstance(text, Exception)]
+            skills = iter(cached_extract_batch(texts, model, batch_size=len(texts)) if texts else [])
+            yield "".join(
+                json.dumps({"id": doc_id, "error": str(text)} if isinstance(text, Exception)
+                           else {"id": doc_id, "skills": next(skills)}) + "\n"
+                for doc_id, text in batch
+            )
+
+    return StreamingResponse(
+        results(), media_type="application/x-ndjson",
+        headers={"X-Model-Version": model.version},
+    )
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "model_version": registry.status()["version"],
+        "results": result_cache.stats(),
+        "span_labels": label_cache_stats(),
+        "paragraphs": PARAGRAPH_CACHE.stats(),
+    }
+
+@app.get("/models")
+def model_status():
+    return registry.status()
+
+def _check_reload_allowed(authorization):
+    if not MODEL_RELOAD_TOKEN:
+        raise HTTPException(status_code=403, detail="Model reload is disabled (set MODEL_RELOAD_TOKEN)")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), MODEL_RELOAD_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing reload token")
+
+
+def _allowed_model_path(path):
+    # The classifier is unpickled by joblib.load, so only trusted dirs are allowed
+    if path is None:
+        return None
+    resolved = Path(path).resolve()
+    if not any(resolved.is_relative_to(root) for root in MODEL_RELOAD_DIRS):
+        raise HTTPException(status_code=400, detail=f"{path} is outside the allowed model directories")
+    return str(resolved)
+
+
+@app.post("/models/reload")
+def reload_model(data: dict = None, authorization: str = Header(None)):
+    # Load, warm up and atomically swap in a (newly trained) model directory;
+    # in-flight requests finish on the model they started with
+    _check_reload_allowed(authorization)
+    data = data or {}
+    ner_path = _allowed_model_path(data.get("ner_path"))
+    clf_path = _allowed_model_path(data.get("clf_path"))
+    try:
+        registry.load(ner_path, clf_path)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving previous model: {exc}")
+    return registry.status()
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.metrics import METRICS
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-text requests into batches.
+
+    Callers `await submit(text)`. Texts are queued until `max_batch_size`
+    have arrived or `max_wait_ms` has passed since the first one, then the
+    whole batch is handed to `fn` (a list of texts -> list of results) on a
+    dedicated worker thread and each caller's future is resolved.
+    """
+
+    def __init__(self, fn, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.fn = fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = None
+        self._task = None
+        self._executor = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batcher")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, fut, _ = self._queue.get_nowait()
+            fut.cancel()
+        self._executor.shutdown(wait=True)
+        self._task = None
+        self._queue = None
+        self._executor = None
+
+    def qsize(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, text):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued before waiting on the clock
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Drop callers that went away while queued
+            batch = [(text, fut, queued) for text, fut, queued in batch if not fut.done()]
+            if not batch:
+                continue
+
+            if METRICS.enabled:
+                now = time.perf_counter()
+                for _, _, queued in batch:
+                    METRICS.observe("skill_stage_seconds", now - queued, stage="queue_wait")
+                METRICS.inc("skill_batches_total")
+                METRICS.inc("skill_batched_requests_total", len(batch))
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.fn, [text for text, _, _ in batch]
+                )
+            except Exception as exc:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+
+            for (_, fut, _), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
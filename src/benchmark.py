@@ -0,0 +1,389 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import random
+import resource
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FILLER_LINES = [
+    "We are looking for a motivated engineer to join our growing team.",
+    "You will work closely with product managers and designers.",
+    "Responsibilities include design, development and maintenance of services.",
+    "Experience: 2-5 years in a similar role.",
+    "Job Location: Bangalore / Pune / Remote.",
+    "Qualification: B.Tech / M.Tech in Computer Science or equivalent.",
+    "Competitive salary and benefits.",
+    "Strong understanding of",
+    "Hands on experience with",
+    "Good knowledge of",
+]
+
+
+def build_corpus(spans_csv: str = "data/spans.csv", n_docs: int = 200, length_dist: str = "lognormal",
+                 mean_words: int = 300, skill_ratio: float = 0.15, seed: int = 0):
+    """Generate synthetic postings from filler lines and labelled spans.
+
+    Document lengths (in words) are drawn from `length_dist`: "fixed",
+    "uniform" (0.5x-1.5x the mean) or "lognormal" (long-tailed, like real
+    postings). Roughly `skill_ratio` of the lines are skill bullets.
+    """
+    rng = random.Random(seed)
+    skills = pd.read_csv(spans_csv)['text'].astype(str).tolist()
+
+    def draw_length():
+        if length_dist == "fixed":
+            return mean_words
+        if length_dist == "uniform":
+            return rng.randint(mean_words // 2, mean_words * 3 // 2)
+        if length_dist == "lognormal":
+            sigma = 0.6
+            return max(5, int(rng.lognormvariate(np.log(mean_words) - sigma ** 2 / 2, sigma)))
+        raise ValueError(f"Unknown length distribution {length_dist!r}")
+
+    docs = []
+    for _ in range(n_docs):
+        target = draw_length()
+        lines, words = [], 0
+        while words < target:
+            if rng.random() < skill_ratio:
+                line = "• " + ", ".join(rng.sample(skills, rng.randint(1, 4)))
+            else:
+                line = rng.choice(FILLER_LINES) + " " + rng.choice(skills)
+            lines.append(line)
+            words += len(line.split())
+        docs.append("\n".join(lines))
+    return docs
+
+
+def max_process_rss_mb():
+    # ru_maxrss is the high-water mark of one process: this process, or the
+    # single largest of its children (not their sum). It is in KiB on Linux
+    # and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return max(own, children) / 2**20
+
+
+def tree_rss_bytes(root_pid):
+    """Summed resident memory of a process and all its descendants, read
+    from /proc; None where /proc is not available."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    children = {}
+    for stat in proc.glob("[0-9]*/stat"):
+        try:
+            # The command name may contain spaces; fields resume after ")"
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+
+    page = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            total += int((proc / str(pid) / "statm").read_text().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            continue
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+class TreeRSSSampler(threading.Thread):
+    """Track the peak summed RSS of a process tree (e.g. a scenario process
+    and its n_process spaCy workers) by polling it from outside."""
+
+    def __init__(self, pid, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = tree_rss_bytes(self.pid)
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak / 2**20 if self.peak is not None else None
+
+
+def summarize(name, latencies, n_docs, n_tokens, elapsed, **params):
+    latencies = np.asarray(latencies) * 1000.0
+    return {
+        "name": name,
+        "params": params,
+        "docs": n_docs,
+        "docs_per_sec": n_docs / elapsed,
+        "tokens_per_sec": n_tokens / elapsed,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "p99": float(np.percentile(latencies, 99)),
+        },
+        "max_process_rss_mb": max_process_rss_mb(),
+    }
+
+
+def time_per_doc(fn, docs):
+    latencies = []
+    start = time.perf_counter()
+    for doc in docs:
+        t0 = time.perf_counter()
+        fn(doc)
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start
+
+
+def time_batches(fn, docs, batch_size):
+    # Every doc of a batch is charged the latency of the whole batch
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch_size):
+        batch = docs[i:i + batch_size]
+        t0 = time.perf_counter()
+        fn(batch)
+        latencies.extend([time.perf_counter() - t0] * len(batch))
+    return latencies, time.perf_counter() - start
+
+
+def time_stream(results, batch_size):
+    """Drain a result iterator; every group of `batch_size` results is
+    charged the time since the previous group came out."""
+    latencies = []
+    start = t0 = time.perf_counter()
+    n = 0
+    for n, _ in enumerate(results, 1):
+        if n % batch_size == 0:
+            now = time.perf_counter()
+            latencies.extend([now - t0] * batch_size)
+            t0 = now
+    if n % batch_size:
+        latencies.extend([time.perf_counter() - t0] * (n % batch_size))
+    return latencies, time.perf_counter() - start
+
+
+def plan_scenarios(args):
+    """List the (scenario, params) runs selected by --scenarios."""
+    scenarios = set(args.scenarios.split(","))
+    runs = []
+    if "extract_and_label" in scenarios:
+        runs.append(("extract_and_label", {}))
+    if "extract_batch" in scenarios:
+        runs.extend(
+            ("extract_batch", {"batch_size": batch_size, "n_process": n_process})
+            for n_process in args.n_process for batch_size in args.batch_sizes
+        )
+    if "skill_extractor" in scenarios:
+        runs.append(("SkillExtractor.predict", {}))
+    if "api" in scenarios:
+        runs.append(("api /extract", {}))
+        runs.extend(("api /extract_batch", {"batch_size": batch_size}) for batch_size in args.batch_sizes)
+    return runs
+
+
+def run_scenario(args, name, params):
+    """Run one scenario and return (result, n_tokens). Meant to run in a
+    fresh process so that its peak RSS is its own."""
+    from src.predict import extract_and_label, iter_extract_batch, load_models
+
+    docs = build_corpus(args.spans_csv, args.n_docs, args.length_dist, args.mean_words, seed=args.seed)
+    nlp, clf = load_models(args.ner, args.clf, mode=args.mode)
+    n_tokens = sum(len(doc) for doc in nlp.tokenizer.pipe(docs))
+    warmup = docs[:min(5, len(docs))]
+
+    if name == "extract_and_label":
+        for doc in warmup:
+            extract_and_label(doc, nlp, clf)
+        timed = time_per_doc(lambda d: extract_and_label(d, nlp, clf), docs)
+
+    elif name == "extract_batch":
+        # One streaming call over the whole corpus, so n_process > 1
+        # starts its worker pool once instead of once per batch
+        list(iter_extract_batch(warmup, nlp, clf, batch_size=params["batch_size"]))
+        timed = time_stream(iter_extract_batch(docs, nlp, clf, **params), params["batch_size"])
+
+    elif name == "SkillExtractor.predict":
+        from src.pipeline import SkillExtractor
+        extractor = SkillExtractor(args.ner, args.clf)
+        for doc in warmup:
+            extractor.predict(doc)
+        timed = time_per_doc(extractor.predict, docs)
+
+    else:
+        # The in-process app loads its own model copy; skip the result cache
+        # so every request measures the pipeline
+        os.environ.update({
+            "NER_MODEL_PATH": args.ner, "CLASSIFIER_PATH": args.clf,
+            "EXTRACTION_MODE": args.mode, "RESULT_CACHE_SIZE": "0",
+        })
+        os.environ.pop("RESULT_CACHE_PATH", None)
+        from fastapi.testclient import TestClient
+        from src.api import app
+
+        with TestClient(app) as client:
+            if name == "api /extract":
+                post = lambda doc: client.post("/extract", json={"text": doc}).raise_for_status()
+                for doc in warmup:
+                    post(doc)
+                timed = time_per_doc(post, docs)
+            else:
+                post_batch = lambda batch: client.post(
+                    "/extract_batch", json={"documents": batch, "batch_size": params["batch_size"]}
+                ).raise_for_status()
+                post_batch(warmup)
+                timed = time_batches(post_batch, docs, params["batch_size"])
+
+    latencies, elapsed = timed
+    return summarize(name, latencies, len(docs), n_tokens, elapsed, **params), n_tokens
+
+
+def _scenario_worker(queue, args, name, params):
+    try:
+        queue.put(("ok", run_scenario(args, name, params)))
+    except Exception:
+        queue.put(("error", traceback.format_exc()))
+
+
+def _wait_for_result(queue, proc):
+    # Don't hang if the scenario process dies without reporting back
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                return "error", f"process exited with code {proc.exitcode}"
+
+
+def run_benchmarks(args):
+    results = []
+    n_tokens = None
+    ctx = multiprocessing.get_context("spawn")
+    for name, params in plan_scenarios(args):
+        # A fresh process per scenario, so memory figures are its own;
+        # peak_rss_mb is the summed RSS of that process and its workers
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_scenario_worker, args=(queue, args, name, params))
+        proc.start()
+        sampler = TreeRSSSampler(proc.pid)
+        sampler.start()
+        status, payload = _wait_for_result(queue, proc)
+        proc.join()
+        peak = sampler.stop()
+        if status == "error":
+            raise RuntimeError(f"Scenario {name} {json.dumps(params)} failed:\n{payload}")
+
+        res, n_tokens = payload
+        res["peak_rss_mb"] = peak
+        results.append(res)
+        rss = f"{peak:>10.0f} MB" if peak is not None else f"{'n/a':>13}"
+        print(f"{name:<28}{json.dumps(params):<36}{res['docs_per_sec']:>10.1f} docs/s"
+              f"{res['latency_ms']['p95']:>10.1f} ms p95{rss}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "ner": args.ner,
+            "clf": args.clf,
+            "mode": args.mode,
+            "n_docs": args.n_docs,
+            "n_tokens": n_tokens,
+            "length_dist": args.length_dist,
+            "mean_words": args.mean_words,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def _scenario_key(res):
+    return res["name"], json.dumps(res["params"], sort_keys=True)
+
+
+def compare(current, baseline, tolerance: float = 0.15):
+    """Return a list of regression messages versus a stored baseline.
+
+    A scenario regresses when its throughput drops, or its p95 latency
+    grows, by more than `tolerance` (a fraction).
+    """
+    base = {_scenario_key(r): r for r in baseline["results"]}
+    regressions = []
+    for res in current["results"]:
+        ref = base.get(_scenario_key(res))
+        if ref is None:
+            continue
+        label = f"{res['name']} {json.dumps(res['params'])}"
+        if res["docs_per_sec"] < ref["docs_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: {res['docs_per_sec']:.1f} docs/s vs baseline {ref['docs_per_sec']:.1f}"
+            )
+        if res["latency_ms"]["p95"] > ref["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p95 {res['latency_ms']['p95']:.1f} ms vs baseline {ref['latency_ms']['p95']:.1f}"
+            )
+    return regressions
+
+
+def _int_list(value):
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Throughput/latency benchmark for skill extraction")
+    p.add_argument("--ner", default="training/model-best")
+    p.add_argument("--clf", default="models/skill_classifier.joblib")
+    p.add_argument("--mode", default="ner", choices=["ner", "gazetteer", "hybrid"])
+    p.add_argument("--spans_csv", default="data/spans.csv")
+    p.add_argument("--n_docs", type=int, default=200)
+    p.add_argument("--length_dist", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    p.add_argument("--mean_words", type=int, default=300)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--batch_sizes", type=_int_list, default=[1, 16, 64])
+    p.add_argument("--n_process", type=_int_list, default=[1])
+    p.add_argument("--scenarios", default="extract_and_label,extract_batch,skill_extractor,api")
+    p.add_argument("--out", default="benchmark_results.json")
+    p.add_argument("--baseline", help="baseline JSON to compare against")
+    p.add_argument("--save_baseline", action="store_true", help="write results to --baseline")
+    p.add_argument("--tolerance", type=float, default=0.15)
+    args = p.parse_args()
+
+    report = run_benchmarks(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Saved benchmark results to {args.out}")
+
+    if args.baseline and args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved baseline to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Performance regressions:")
+            for msg in regressions:
+                print(f" - {msg}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
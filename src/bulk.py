@@ -0,0 +1,175 @@
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from src.predict import iter_extract_batch
+
+# Job descriptions can be far longer than the csv module's default field limit
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+def iter_csv_records(fh, column: str = "description", yield_errors: bool = False):
+    """Yield (id, text) for every row of a CSV file object, one row at a time.
+
+    With `yield_errors`, a row the csv module cannot parse is yielded as
+    (id, exception) and reading continues; otherwise the error is raised.
+    """
+    reader = csv.DictReader(fh)
+    if reader.fieldnames is not None and column not in reader.fieldnames:
+        raise ValueError(f"Column {column!r} not found in CSV header: {reader.fieldnames}")
+    for i in itertools.count():
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            if not yield_errors:
+                raise
+            yield i, exc
+            continue
+        yield i, row[column] or ""
+
+
+def iter_jsonl_records(fh, field: str = "text", yield_errors: bool = False):
+    """Yield (id, text) for every line of a JSONL file object.
+
+    The id is taken from an "id" key when present, else the line number.
+    With `yield_errors`, a malformed line is yielded as (line number,
+    exception) and reading continues; otherwise the error is raised.
+    """
+    for i, line in enumerate(fh):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, (str, dict)):
+                raise ValueError(f"Expected a JSON object or string, got {type(item).__name__}")
+        except ValueError as exc:
+            if not yield_errors:
+                raise
+            yield i, exc
+            continue
+        if isinstance(item, str):
+            yield i, item
+        else:
+            yield item.get("id", i), str(item.get(field) or "")
+
+
+def iter_text_records(fh):
+    """Yield (paragraph number, text) for the blank-line separated paragraphs of a text file object."""
+    lines = []
+    i = 0
+    for line in fh:
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            yield i, "".join(lines).rstrip("\r\n")
+            lines = []
+            i += 1
+    if lines:
+        yield i, "".join(lines).rstrip("\r\n")
+
+
+def iter_records(fh, fmt: str, column: str = None, yield_errors: bool = False):
+    if fmt == "csv":
+        return iter_csv_records(fh, column or "description", yield_errors)
+    if fmt == "jsonl":
+        return iter_jsonl_records(fh, column or "text", yield_errors)
+    if fmt == "text":
+        return iter_text_records(fh)
+    raise ValueError(f"Unsupported input format: {fmt!r}")
+
+
+def guess_format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix in (".txt", ".text", ".md"):
+        return "text"
+    return "csv"
+
+
+def _read_checkpoint(path):
+    if path and Path(path).exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def _write_checkpoint(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run_bulk(input_path, output_path, nlp, clf, column: str = None, fmt: str = None,
+             batch_size: int = 64, n_process: int = 1, checkpoint_path: str = None,
+             checkpoint_every: int = 1000, log_every: int = 1000):
+    """Stream a CSV/JSONL corpus through the pipeline and write JSONL results.
+
+    Records are read lazily and results are appended as soon as each batch
+    is labelled, so memory does not grow with the corpus. With a checkpoint,
+    a rerun skips the records already written and truncates any partial
+    output written after the last checkpoint.
+    """
+    fmt = fmt or guess_format(input_path)
+    state = _read_checkpoint(checkpoint_path)
+    if state and Path(state["input"]).resolve() != Path(input_path).resolve():
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} belongs to {state['input']}, not {input_path}; "
+            f"delete it to start over"
+        )
+    if state and (not Path(output_path).exists() or Path(output_path).stat().st_size < state["offset"]):
+        # The results the checkpoint counts are gone; skipping them would lose them
+        print(f"⚠️ {output_path} is missing or shorter than the checkpoint; starting over",
+              file=sys.stderr)
+        state = None
+    done = state["done"] if state else 0
+    offset = state["offset"] if state else 0
+
+    mode = "r+" if state else "w"
+    with open(input_path, "r", encoding="utf-8", errors="ignore", newline="") as fin, \
+            open(output_path, mode, encoding="utf-8") as fout:
+        if mode == "r+":
+            fout.seek(offset)
+            fout.truncate()
+            print(f"↻ Resuming from checkpoint: {done} docs already written", file=sys.stderr)
+
+        records = itertools.islice(iter_records(fin, fmt, column), done, None)
+        ids, texts = itertools.tee(records)
+        ids = (doc_id for doc_id, _ in ids)
+        texts = (text for _, text in texts)
+
+        start = time.perf_counter()
+        n = 0
+        results = iter_extract_batch(texts, nlp, clf, batch_size=batch_size, n_process=n_process)
+        for doc_id, skills in zip(ids, results):
+            fout.write(json.dumps({"id": doc_id, "skills": skills}) + "\n")
+            n += 1
+
+            if checkpoint_path and n % checkpoint_every == 0:
+                fout.flush()
+                _write_checkpoint(checkpoint_path, {
+                    "input": str(input_path), "done": done + n, "offset": fout.tell()
+                })
+            if log_every and n % log_every == 0:
+                rate = n / (time.perf_counter() - start)
+                print(f"{done + n} docs ({rate:.1f} docs/sec)", file=sys.stderr)
+
+        fout.flush()
+        if checkpoint_path:
+            _write_checkpoint(checkpoint_path, {
+                "input": str(input_path), "done": done + n, "offset": fout.tell()
+            })
+
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Wrote {n} docs to {output_path} in {elapsed:.1f}s ({rate:.1f} docs/sec)",
+          file=sys.stderr)
+    return n
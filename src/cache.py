@@ -0,0 +1,202 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe bounded mapping with LRU eviction and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LabelCache(LRUCache):
+    """Normalized span -> classifier label cache for a single classifier.
+
+    Never share one between classifiers: while a reloaded model is swapped
+    in, requests on the old and the new model run side by side.
+    """
+
+
+class ResultCache:
+    """Content-addressed cache of whole-document extraction results.
+
+    Entries are keyed on a hash of the model version and the document text
+    and kept in an in-memory LRU. If `path` is given, results are also stored
+    in a sqlite file so they survive restarts and are shared by workers.
+    `ttl` (seconds) expires entries in both layers; `maxsize` and
+    `max_disk_entries` bound their sizes. A cache with `maxsize=0` and no
+    `path` is disabled. sqlite errors (e.g. "database is locked" when
+    several workers share the file) count as a miss or a skipped write.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, path: str = None,
+                 max_disk_entries: int = 100_000):
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = LRUCache(maxsize)
+        self._db = None
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.disk_errors = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._db.commit()
+
+    @property
+    def enabled(self):
+        return self._memory.maxsize > 0 or self._db is not None
+
+    @staticmethod
+    def key(text: str, version: str) -> str:
+        h = hashlib.sha256()
+        h.update(version.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8", errors="surrogatepass"))
+        return h.hexdigest()
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is not None and not self._expired(entry[0]):
+            self.hits += 1
+            return entry[1]
+
+        if self._db is not None:
+            try:
+                with self._lock:
+                    row = self._db.execute(
+                        "SELECT value, created FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+            except sqlite3.Error:
+                self.disk_errors += 1
+                row = None
+            if row is not None and not self._expired(row[1]):
+                value = json.loads(row[0])
+                self._memory.put(key, (row[1], value))
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        created = time.time()
+        self._memory.put(key, (created, value))
+        if self._db is None:
+            return
+
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created),
+                )
+                self._puts += 1
+                if self._puts % self.PRUNE_EVERY == 0:
+                    self._prune()
+                self._db.commit()
+            except sqlite3.Error:
+                self.disk_errors += 1
+                self._db.rollback()
+
+    def _prune(self):
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def clear(self):
+        self._memory.clear()
+        self.hits = 0
+        self.misses = 0
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_size": len(self._memory),
+            "memory_maxsize": self._memory.maxsize,
+            "ttl": self.ttl,
+        }
+        if self._db is not None:
+            try:
+                with self._lock:
+                    stats["disk_size"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except sqlite3.Error:
+                stats["disk_size"] = None
+            stats["disk_maxsize"] = self.max_disk_entries
+            stats["disk_errors"] = self.disk_errors
+        return stats
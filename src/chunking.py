@@ -0,0 +1,71 @@
+import re
+
+# A segment is one line of the posting: a paragraph, a bullet or a heading.
+_LINE = re.compile(r"[^\n]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def iter_segments(text: str):
+    """Yield (start, end) offsets of the non-blank lines of `text`."""
+    for m in _LINE.finditer(text):
+        if m.group().strip():
+            yield m.start(), m.end()
+
+
+def _split_long(start: int, end: int, text: str, max_chars: int):
+    # Break a single over-long line at whitespace so no piece exceeds max_chars
+    while end - start > max_chars:
+        cut = start + max_chars
+        ws = [m.start() for m in _WHITESPACE.finditer(text, start, cut)]
+        if ws and ws[-1] > start:
+            cut = ws[-1]
+        yield start, cut
+        start = cut
+    yield start, end
+
+
+def chunk_text(text: str, max_chars: int, overlap: int = 0):
+    """Split `text` into chunks of at most `max_chars` on line boundaries.
+
+    Returns a list of (start, end) offsets into `text`. Consecutive chunks
+    share trailing lines totalling at most `overlap` characters so entities
+    near a boundary are seen with context on both sides.
+    """
+    segments = []
+    for start, end in iter_segments(text):
+        segments.extend(_split_long(start, end, text, max_chars))
+
+    chunks = []
+    i = 0
+    while i < len(segments):
+        chunk_start = segments[i][0]
+        j = i + 1
+        while j < len(segments) and segments[j][1] - chunk_start <= max_chars:
+            j += 1
+        chunk_end = segments[j - 1][1]
+        chunks.append((chunk_start, chunk_end))
+        if j >= len(segments):
+            break
+
+        # Step back over trailing lines that fit in the overlap window
+        k = j
+        while k - 1 > i and chunk_end - segments[k - 1][0] <= overlap:
+            k -= 1
+        i = k
+
+    return chunks
+
+
+def merge_overlapping(ents):
+    """Drop duplicate/overlapping entities found in chunk overlap regions.
+
+    `ents` are tuples starting with (start, end, ...). They are returned in
+    document order; for overlapping entities the earliest, then longest wins.
+    """
+    merged = []
+    last_end = -1
+    for ent in sorted(ents, key=lambda e: (e[0], -e[1])):
+        if ent[0] >= last_end:
+            merged.append(ent)
+            last_end = ent[1]
+    return merged
@@ -1,9 +1,12 @@
 import argparse
+import hashlib
 import pandas as pd
 import json
-import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from spacy.tokens import DocBin
+from spacy.matcher import PhraseMatcher
 import spacy
 from spacy.util import filter_spans
 from tqdm import tqdm
@@ -18,11 +21,43 @@ def read_seed_list(path: Path):
     return set(pd.read_csv(path, header=None)[0].str.lower().str.strip().tolist())
 
 
-def find_span_offsets(text, phrase):
-    spans = []
-    for match in re.finditer(re.escape(phrase), text, flags=re.IGNORECASE):
-        spans.append((match.start(), match.end()))
-    return spans
+def build_phrase_matcher(phrases):
+    """Compile all phrases into one case-insensitive PhraseMatcher.
+
+    Each phrase is registered under its lowercased text, which is the key
+    `match_phrases` reports back.
+    """
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    keys = sorted({str(p).lower().strip() for p in phrases} - {""})
+    for key, pattern in zip(keys, nlp.tokenizer.pipe(keys)):
+        if len(pattern):
+            matcher.add(key, [pattern])
+    return matcher
+
+
+def match_phrases(matcher, doc):
+    """Yield (phrase, start_char, end_char) for every phrase match in doc."""
+    for match_id, start, end in matcher(doc):
+        span = doc[start:end]
+        yield nlp.vocab.strings[match_id], span.start_char, span.end_char
+
+
+def parse_skills_field(x, technical_seeds, soft_seeds):
+    """Parse a skills cell like "python:technical; communication:soft"."""
+    skills = []
+    for token in str(x).split(";"):
+        token = token.strip()
+        if not token:
+            continue
+        if ":" in token:
+            skill, lbl = token.split(":", 1)
+            skill = skill.strip()
+            lbl = lbl.strip()
+        else:
+            skill = token
+            lbl = guess_label(skill, technical_seeds, soft_seeds)
+        skills.append((skill, lbl))
+    return skills
 
 
 def parse_entities_field(x):
@@ -41,7 +76,14 @@ def guess_label(skill_text, technical_seeds, soft_seeds):
     return 'unknown'
 
 
-def make_docbin(examples, out_path):
+def is_dev_example(text, dev_ratio):
+    # Hash-based split: a document always lands in the same split,
+    # whatever its position in the corpus or the chunk it is read in
+    h = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+    return h / 0xFFFFFFFF < dev_ratio
+
+
+def examples_to_docbin(examples):
     db = DocBin(store_user_data=True)
     for doc, ents in examples:
         spans = []
@@ -52,23 +94,42 @@ def make_docbin(examples, out_path):
         spans = filter_spans(spans)
         doc.ents = spans
         db.add(doc)
+    return db
+
+
+def make_docbin(examples, out_path):
+    db = examples_to_docbin(examples)
     db.to_disk(out_path)
     print(f"✅ Saved DocBin: {out_path} ({len(examples)} docs)")
 
 
-def build_from_annotated(df, technical_seeds, soft_seeds):
+def build_from_annotated(df, technical_seeds, soft_seeds, seed_matcher=None, progress=True):
     examples = []
     spans_rows = []
 
-    for _, row in tqdm(df.iterrows(), total=len(df)):
-        text = str(row['description'])
+    # Every phrase is matched in a single pass over each doc: one matcher for
+    # the seed lists, one for all phrases of the skills column.
+    if seed_matcher is None:
+        seed_matcher = build_phrase_matcher(set(technical_seeds) | set(soft_seeds))
+    has_skills = 'skills' in df.columns
+    row_skills = (
+        df['skills'].map(lambda x: parse_skills_field(x, technical_seeds, soft_seeds) if pd.notna(x) else None)
+        if has_skills else pd.Series([None] * len(df), index=df.index)
+    )
+    skills_matcher = build_phrase_matcher(
+        skill for skills in row_skills if skills for skill, _ in skills
+    )
+
+    texts = (str(x) for x in df['description'])
+    docs = nlp.pipe(texts, batch_size=256)
+    for (_, row), skills, doc in tqdm(zip(df.iterrows(), row_skills, docs), total=len(df), disable=not progress):
+        text = doc.text
         ents = []
 
         # Case 1: Entities already annotated in JSON format
         if 'entities' in row and pd.notna(row['entities']):
             parsed = parse_entities_field(row['entities'])
             if parsed:
-                doc = nlp(text)
                 for ent in parsed:
                     s = int(ent['start'])
                     e = int(ent['end'])
@@ -79,42 +140,26 @@ def build_from_annotated(df, technical_seeds, soft_seeds):
                 continue
 
         # Case 2: skills column like "python:technical; communication:soft"
-        if 'skills' in row and pd.notna(row['skills']):
-            doc = nlp(text)
-            tokens = str(row['skills']).split(";")
-            for token in tokens:
-                token = token.strip()
-                if not token:
-                    continue
-                if ":" in token:
-                    skill, lbl = token.split(":", 1)
-                    skill = skill.strip()
-                    lbl = lbl.strip()
-                else:
-                    skill = token
-                    lbl = guess_label(skill, technical_seeds, soft_seeds)
-
-                for s, e in find_span_offsets(text, skill):
+        if skills:
+            wanted = {skill.lower(): lbl for skill, lbl in skills}
+            for phrase, s, e in match_phrases(skills_matcher, doc):
+                if phrase in wanted:
                     ents.append((s, e, "SKILL"))
-                    spans_rows.append({'text': text[s:e], 'label': lbl})
+                    spans_rows.append({'text': text[s:e], 'label': wanted[phrase]})
             if ents:
                 examples.append((doc, ents))
                 continue
 
         # Case 3: fallback seed-based weak supervision
-        found = False
-        doc = nlp(text)
-        for phrase in list(technical_seeds) + list(soft_seeds):
-            for s, e in find_span_offsets(text, phrase):
-                ents.append((s, e, "SKILL"))
-                lbl = 'technical' if phrase in technical_seeds else 'soft'
-                spans_rows.append({'text': text[s:e], 'label': lbl})
-                found = True
-
-        if found:
+        for phrase, s, e in match_phrases(seed_matcher, doc):
+            ents.append((s, e, "SKILL"))
+            lbl = 'technical' if phrase in technical_seeds else 'soft'
+            spans_rows.append({'text': text[s:e], 'label': lbl})
+
+        if ents:
             examples.append((doc, ents))
 
-    return examples, pd.DataFrame(spans_rows)
+    return examples, pd.DataFrame(spans_rows, columns=['text', 'label'])
 
 
 def main(args):
@@ -137,6 +182,91 @@ def main(args):
     print(f"✅ Saved spans to: {args.spans_csv}")
 
 
+_worker_state = {}
+
+
+def _init_shard_worker(technical_seeds, soft_seeds):
+    _worker_state['technical_seeds'] = technical_seeds
+    _worker_state['soft_seeds'] = soft_seeds
+    _worker_state['seed_matcher'] = build_phrase_matcher(technical_seeds | soft_seeds)
+
+
+def _build_shard(shard_id, df, train_dir, dev_dir, dev_ratio):
+    examples, spans_df = build_from_annotated(
+        df, _worker_state['technical_seeds'], _worker_state['soft_seeds'],
+        seed_matcher=_worker_state['seed_matcher'], progress=False,
+    )
+    train_exs, dev_exs = [], []
+    for doc, ents in examples:
+        (dev_exs if is_dev_example(doc.text, dev_ratio) else train_exs).append((doc, ents))
+
+    name = f"shard-{shard_id:05d}.spacy"
+    if train_exs:
+        examples_to_docbin(train_exs).to_disk(Path(train_dir) / name)
+    if dev_exs:
+        examples_to_docbin(dev_exs).to_disk(Path(dev_dir) / name)
+    return shard_id, len(train_exs), len(dev_exs), spans_df
+
+
+def main_sharded(args):
+    """Stream the CSV in chunks of --shard_size rows and write one train and
+    one dev DocBin shard per chunk into the --out and --dev directories.
+
+    Chunks are built in --n_workers processes with at most a few chunks in
+    flight, so memory is bounded by the shard size rather than the corpus.
+    `spacy train` reads every .spacy file of a directory given as a path.
+    """
+    technical_seeds = read_seed_list(Path(args.technical_seed))
+    soft_seeds = read_seed_list(Path(args.soft_seed))
+    for out_dir in (Path(args.out), Path(args.dev)):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        # A smaller rerun must not leave shards of a previous run behind,
+        # since `spacy train` would read them too
+        stale = sorted(out_dir.glob("shard-*.spacy"))
+        for shard in stale:
+            shard.unlink()
+        if stale:
+            print(f"⚠️ Removed {len(stale)} shards of a previous run from {out_dir}")
+
+    chunks = pd.read_csv(args.csv, chunksize=args.shard_size)
+    n_train = n_dev = n_spans = 0
+    header = True
+
+    def write_result(result):
+        nonlocal n_train, n_dev, n_spans, header
+        shard_id, train_count, dev_count, spans_df = result
+        n_train += train_count
+        n_dev += dev_count
+        n_spans += len(spans_df)
+        spans_df.to_csv(args.spans_csv, mode="w" if header else "a", header=header, index=False)
+        header = False
+        print(f"✅ Shard {shard_id:05d}: {train_count} train / {dev_count} dev docs")
+
+    if args.n_workers <= 1:
+        _init_shard_worker(technical_seeds, soft_seeds)
+        for shard_id, df in enumerate(chunks):
+            write_result(_build_shard(shard_id, df, args.out, args.dev, args.dev_ratio))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=args.n_workers,
+            initializer=_init_shard_worker,
+            initargs=(technical_seeds, soft_seeds),
+        ) as pool:
+            pending = deque()
+            for shard_id, df in enumerate(chunks):
+                pending.append(pool.submit(_build_shard, shard_id, df, args.out, args.dev, args.dev_ratio))
+                if len(pending) >= 2 * args.n_workers:
+                    write_result(pending.popleft().result())
+            while pending:
+                write_result(pending.popleft().result())
+
+    if header:
+        pd.DataFrame(columns=['text', 'label']).to_csv(args.spans_csv, index=False)
+    print(f"✅ Built {n_train} train / {n_dev} dev documents and {n_spans} labeled skill spans")
+    print(f"✅ Saved DocBin shards to: {args.out} and {args.dev}")
+    print(f"✅ Saved spans to: {args.spans_csv}")
+
+
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--csv", required=True)
@@ -145,6 +275,14 @@ if __name__ == "__main__":
     p.add_argument("--spans_csv", required=True)
     p.add_argument("--technical_seed", default="data/technical_skills.csv")
     p.add_argument("--soft_seed", default="data/soft_skills.csv")
+    p.add_argument("--shard_size", type=int, default=0,
+                   help="stream the CSV and write DocBin shards of this many rows; "
+                        "--out and --dev are then directories")
+    p.add_argument("--n_workers", type=int, default=1, help="processes building shards")
+    p.add_argument("--dev_ratio", type=float, default=0.1, help="hash-based dev fraction (sharded mode)")
 
     args = p.parse_args()
-    main(args)
+    if args.shard_size > 0:
+        main_sharded(args)
+    else:
+        main(args)
@@ -0,0 +1,114 @@
+import re
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def export_path_for(classifier_path) -> Path:
+    """The NumPy export lives next to the classifier: foo.joblib -> foo.npz"""
+    return Path(classifier_path).with_suffix(".npz")
+
+
+def export_pipeline(pipe, out_path):
+    """Write a fitted TfidfVectorizer + linear classifier Pipeline to .npz.
+
+    Only the settings NumpyClassifier reproduces are supported; anything
+    else raises ValueError rather than exporting a model that disagrees
+    with sklearn.
+    """
+    vec, clf = pipe.steps[0][1], pipe.steps[-1][1]
+    if not hasattr(vec, "vocabulary_") or not hasattr(vec, "idf_") or not hasattr(clf, "coef_"):
+        raise ValueError("Only TfidfVectorizer + linear classifier pipelines can be exported")
+    if (vec.analyzer != "word" or vec.preprocessor is not None or vec.tokenizer is not None
+            or vec.stop_words is not None or vec.strip_accents is not None or vec.binary
+            or vec.norm not in ("l2", None) or not vec.use_idf):
+        raise ValueError("Unsupported TfidfVectorizer settings for NumPy export")
+
+    terms = sorted(vec.vocabulary_, key=vec.vocabulary_.get)
+    np.savez(
+        out_path,
+        format_version=np.array(FORMAT_VERSION),
+        terms=np.array(terms),
+        idf=vec.idf_.astype(np.float64),
+        coef=clf.coef_.astype(np.float64),
+        intercept=np.asarray(clf.intercept_, dtype=np.float64),
+        classes=np.array([str(c) for c in clf.classes_]),
+        ngram_range=np.array(vec.ngram_range),
+        lowercase=np.array(vec.lowercase),
+        token_pattern=np.array(vec.token_pattern),
+        norm=np.array(vec.norm or ""),
+        sublinear_tf=np.array(vec.sublinear_tf),
+    )
+
+
+class NumpyClassifier:
+    """Drop-in `predict` for an exported TF-IDF + linear classifier.
+
+    Tokenizes like TfidfVectorizer, looks n-grams up in the fitted
+    vocabulary and scores all texts with one sparse dot product in NumPy,
+    so sklearn is not needed at inference time.
+    """
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported classifier export format in {path}")
+            self.vocabulary = {term: i for i, term in enumerate(data["terms"].tolist())}
+            self.idf = data["idf"]
+            self.coef = data["coef"]
+            self.intercept = data["intercept"]
+            self.classes = data["classes"]
+            self.min_n, self.max_n = (int(n) for n in data["ngram_range"])
+            self.lowercase = bool(data["lowercase"])
+            self.token_pattern = re.compile(str(data["token_pattern"]))
+            self.norm = str(data["norm"]) or None
+            self.sublinear_tf = bool(data["sublinear_tf"])
+
+    def _ngrams(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        for n in range(self.min_n, min(self.max_n, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                yield " ".join(tokens[i:i + n])
+
+    def transform(self, texts):
+        """Return the tf-idf matrix in COO form: (rows, cols, values)."""
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for gram in self._ngrams(text):
+                col = self.vocabulary.get(gram)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+
+        n_features = len(self.idf)
+        cells, counts = np.unique(
+            np.asarray(rows, dtype=np.int64) * n_features + np.asarray(cols, dtype=np.int64),
+            return_counts=True,
+        )
+        rows, cols = cells // n_features, cells % n_features
+        values = counts.astype(np.float64)
+        if self.sublinear_tf:
+            values = np.log(values) + 1.0
+        values *= self.idf[cols]
+
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(texts)))
+            values /= norms[rows]
+        return rows, cols, values
+
+    def decision_function(self, texts):
+        texts = list(texts)
+        rows, cols, values = self.transform(texts)
+        scores = np.tile(self.intercept, (len(texts), 1))
+        np.add.at(scores, rows, values[:, None] * self.coef[:, cols].T)
+        return scores
+
+    def predict(self, texts):
+        scores = self.decision_function(texts)
+        if scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(int)]
+        return self.classes[scores.argmax(axis=1)]
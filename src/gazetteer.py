@@ -0,0 +1,66 @@
+import hashlib
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+from src.label_index import normalize_span
+
+TECHNICAL_SEED_PATH = "data/technical_skills.csv"
+SOFT_SEED_PATH = "data/soft_skills.csv"
+SPANS_PATH = "data/spans.csv"
+
+LABELS = ("technical", "soft")
+
+
+def load_gazetteer(technical_path: str = TECHNICAL_SEED_PATH, soft_path: str = SOFT_SEED_PATH,
+                   spans_path: str = SPANS_PATH):
+    """Build a normalized phrase -> label dictionary.
+
+    Labels in spans.csv are resolved by majority vote; the curated seed lists
+    take precedence over it. Phrases without any letter or digit are skipped.
+    """
+    votes = defaultdict(Counter)
+    if spans_path and Path(spans_path).exists():
+        spans = pd.read_csv(spans_path)
+        spans = spans[spans['label'].isin(LABELS)]
+        for text, label in zip(spans['text'], spans['label']):
+            votes[normalize_span(text)][label] += 1
+
+    gazetteer = {phrase: counts.most_common(1)[0][0] for phrase, counts in votes.items()}
+    for path, label in ((soft_path, "soft"), (technical_path, "technical")):
+        if path and Path(path).exists():
+            for phrase in pd.read_csv(path, header=None)[0]:
+                gazetteer[normalize_span(phrase)] = label
+
+    return {
+        phrase: label for phrase, label in gazetteer.items()
+        if any(c.isalnum() for c in phrase)
+    }
+
+
+def gazetteer_digest(gazetteer) -> str:
+    """Short content hash of a phrase -> label dictionary, for model versions."""
+    h = hashlib.sha1()
+    for phrase, label in sorted(gazetteer.items()):
+        h.update(f"{phrase}\t{label}\n".encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def add_gazetteer(nlp, gazetteer, before: str = None):
+    """Add an entity_ruler that tags every gazetteer phrase as SKILL.
+
+    The phrase's label is stored as the pattern id, so it is available as
+    `ent.ent_id_` and no classifier call is needed for these spans. With
+    `before="ner"` the NER respects the ruler's spans and only fills gaps.
+    """
+    ruler = nlp.add_pipe(
+        "entity_ruler", name="skill_gazetteer", before=before,
+        config={"phrase_matcher_attr": "LOWER"},
+    )
+    with nlp.select_pipes(enable=[]):
+        ruler.add_patterns([
+            {"label": "SKILL", "pattern": phrase, "id": label}
+            for phrase, label in gazetteer.items()
+        ])
+    return ruler
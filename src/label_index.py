@@ -0,0 +1,119 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MAX_KEY_CHARS = 256
+
+
+def normalize_span(text: str) -> str:
+    # Lowercase and collapse whitespace; the TF-IDF features are unchanged
+    return " ".join(str(text).lower().split())
+
+
+def index_path_for(classifier_path) -> Path:
+    """The label index lives next to the classifier: foo.joblib -> foo.index/"""
+    return Path(classifier_path).with_suffix(".index")
+
+
+def count_labels(texts, labels, counts=None):
+    """Accumulate {normalized span: {label: count}} from labelled spans."""
+    counts = {} if counts is None else counts
+    for text, label in zip(texts, labels):
+        key = normalize_span(text)
+        if key and len(key) <= MAX_KEY_CHARS:
+            per_label = counts.setdefault(key, {})
+            per_label[label] = per_label.get(label, 0) + 1
+    return counts
+
+
+def save_label_index(counts, out_dir, source: str = None):
+    """Write the index as sorted, memory-mappable arrays plus a meta.json.
+
+    keys.npy holds the sorted normalized spans, counts.npy one row of
+    per-label vote counts per key; the majority label and conflict counts
+    are derived from it at lookup time.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    labels = sorted({label for per_label in counts.values() for label in per_label})
+    keys = sorted(counts)
+    width = max((len(k) for k in keys), default=1)
+    key_arr = np.array(keys, dtype=f"U{width}")
+    count_arr = np.zeros((len(keys), len(labels)), dtype=np.uint32)
+    for i, key in enumerate(keys):
+        for label, n in counts[key].items():
+            count_arr[i, labels.index(label)] = n
+
+    np.save(out_dir / "keys.npy", key_arr)
+    np.save(out_dir / "counts.npy", count_arr)
+    conflicts = int(((count_arr > 0).sum(axis=1) > 1).sum())
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "labels": labels,
+        "n_entries": len(keys),
+        "n_conflicting": conflicts,
+        "source": source,
+    }
+    with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class LabelIndex:
+    """O(log n) exact-match lookup of normalized span -> majority label."""
+
+    def __init__(self, index_dir, mmap: bool = True):
+        index_dir = Path(index_dir)
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported label index format {self.meta.get('format_version')} in {index_dir}"
+            )
+        mmap_mode = "r" if mmap else None
+        self.labels = self.meta["labels"]
+        self.keys = np.load(index_dir / "keys.npy", mmap_mode=mmap_mode)
+        self.counts = np.load(index_dir / "counts.npy", mmap_mode=mmap_mode)
+        self._width = self.keys.dtype.itemsize // 4
+
+    def __len__(self):
+        return len(self.keys)
+
+    def label_counts(self):
+        """Return the index as {normalized span: {label: count}}, e.g. to extend it."""
+        return {
+            str(key): {label: int(n) for label, n in zip(self.labels, row) if n}
+            for key, row in zip(self.keys, self.counts)
+        }
+
+    def lookup(self, texts):
+        """Return the majority label of every text, or None if unseen."""
+        queries = [normalize_span(t) for t in texts]
+        if not queries or not len(self.keys):
+            return [None] * len(queries)
+
+        q = np.array(queries, dtype=self.keys.dtype)
+        pos = np.searchsorted(self.keys, q).clip(max=len(self.keys) - 1)
+        found = (self.keys[pos] == q) & np.array([len(t) <= self._width for t in queries])
+        best = self.counts[pos].argmax(axis=1)
+        return [self.labels[b] if hit else None for b, hit in zip(best, found)]
+
+
+class IndexedClassifier:
+    """Answer from the label index first, fall back to `clf` for unseen spans."""
+
+    def __init__(self, clf, index: LabelIndex):
+        self.clf = clf
+        self.index = index
+
+    def predict(self, texts):
+        texts = list(texts)
+        labels = self.index.lookup(texts)
+        missing = [i for i, label in enumerate(labels) if label is None]
+        if missing and self.clf is not None:
+            for i, label in zip(missing, self.clf.predict([texts[i] for i in missing])):
+                labels[i] = label
+        return labels
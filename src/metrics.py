@@ -0,0 +1,177 @@
+import threading
+import time
+from contextlib import nullcontext
+
+# Seconds; covers sub-millisecond classifier calls up to multi-second batches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe("skill_stage_seconds", time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+class Metrics:
+    """In-process timing histograms, counters and gauges.
+
+    Everything is a no-op while `enabled` is False: `stage()` returns a
+    shared null context and `observe`/`inc` return immediately, so the
+    hot path only pays for one attribute check. Gauges are callbacks read
+    at render time (queue depth, cache statistics).
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, name)
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_gauge(self, name, fn, help_text: str = None):
+        """`fn()` returns a number or a {label value: number} dict keyed on `key`."""
+        self._gauges[name] = fn
+        if help_text:
+            self._help[name] = help_text
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def stage_summary(self):
+        """Return {stage: {"count", "total", "mean"}} from the stage histograms."""
+        with self._lock:
+            return {
+                dict(labels)["stage"]: {
+                    "count": hist.count,
+                    "total": hist.sum,
+                    "mean": hist.sum / hist.count if hist.count else 0.0,
+                }
+                for (name, labels), hist in self._histograms.items()
+                if name == "skill_stage_seconds"
+            }
+
+    def format_summary(self):
+        """Human-readable per-stage table for CLI profiling."""
+        stages = self.stage_summary()
+        total = sum(s["total"] for s in stages.values()) or 1.0
+        lines = [f"{'stage':<20}{'calls':>8}{'total s':>10}{'mean ms':>10}{'share':>8}"]
+        for stage, s in sorted(stages.items(), key=lambda kv: -kv[1]["total"]):
+            lines.append(
+                f"{stage:<20}{s['count']:>8}{s['total']:>10.3f}"
+                f"{s['mean'] * 1000:>10.2f}{s['total'] / total:>8.1%}"
+            )
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines)
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        out = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        seen = set()
+        for (name, labels), hist in histograms:
+            if name not in seen:
+                seen.add(name)
+                out.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                out.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            out.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist.count}")
+            out.append(f"{name}_sum{_format_labels(labels)} {hist.sum}")
+            out.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                out.append(f"# TYPE {name} counter")
+            out.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name, fn in sorted(self._gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if name in self._help:
+                out.append(f"# HELP {name} {self._help[name]}")
+            out.append(f"# TYPE {name} gauge")
+            if isinstance(value, dict):
+                for key, v in sorted(value.items()):
+                    if not isinstance(v, (int, float)):
+                        continue
+                    out.append(f"{name}{_format_labels((('key', key),))} {float(v)}")
+            else:
+                out.append(f"{name} {float(value)}")
+
+        return "\n".join(out) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+# Process-wide registry used by the extraction hot path
+METRICS = Metrics()
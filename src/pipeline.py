@@ -1,6 +1,7 @@
 import spacy
 import joblib
 import sys
+from src.predict import label_spans
 
 class SkillExtractor:
     def __init__(self, ner_model_path, classifier_path):
@@ -9,7 +10,7 @@ class SkillExtractor:
 
     def predict(self, text):
         doc = self.nlp(text)
-        results = []
+        skills = []
         seen = set()  # to store normalized names
 
         for ent in doc.ents:
@@ -20,13 +21,17 @@ class SkillExtractor:
             if skill_norm in seen:
                 continue
             seen.add(skill_norm)
+            skills.append(skill_original)
 
-            label = self.clf.predict([skill_original])[0]  # "technical" or "soft"
-            results.append({
-                "skill": skill_original,
-                "type": label
-            })
-        return results
+        if not skills:
+            return []
+
+        # One (cached) classifier call for the whole document
+        spans = label_spans([{"span": skill, "label": None} for skill in skills], self.clf)
+        return [
+            {"skill": s["span"], "type": s["label"]}  # "technical" or "soft"
+            for s in spans
+        ]
 
 
 if __name__ == "__main__":
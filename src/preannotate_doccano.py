@@ -1,28 +1,175 @@
-import pandas as pd
-import re
+import argparse
+import itertools
 import json
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.bulk import iter_csv_records
+from src.predict import iter_doc_ents, label_spans, load_models
+
+
+def load_seed_labels(technical_path, soft_path):
+    """Map every lowercased seed phrase to its label; technical wins ties."""
+    labels = {}
+    for path, label in ((soft_path, "soft"), (technical_path, "technical")):
+        for s in pd.read_csv(path, header=None)[0].dropna():
+            phrase = str(s).lower().strip()
+            if phrase:
+                labels[phrase] = label
+    return labels
+
+
+def compile_seed_pattern(seed_labels):
+    # One alternation for both lists. Longer phrases are tried first, so at
+    # any position the longest seed wins and matches never overlap. The
+    # lookarounds act like \b but also work for seeds such as "C++" or "C#".
+    phrases = sorted(seed_labels, key=lambda p: (-len(p), p))
+    return re.compile(r'(?<!\w)(' + '|'.join(map(re.escape, phrases)) + r')(?!\w)', flags=re.IGNORECASE)
+
+
+def seed_label(matched, seed_labels):
+    """Label of the seed a match came from.
+
+    IGNORECASE matching is not the same as lower(): "GİT" matches the seed
+    "git" but lowercases to "gi̇t". Such matches are resolved by finding the
+    first seed, in pattern order, that matches the text in full; the result
+    is cached in `seed_labels`.
+    """
+    label = seed_labels.get(matched.lower())
+    if label is None:
+        phrase = next(
+            p for p in sorted(seed_labels, key=lambda p: (-len(p), p))
+            if re.fullmatch(re.escape(p), matched, flags=re.IGNORECASE)
+        )
+        label = seed_labels[matched.lower()] = seed_labels[phrase]
+    return label
+
+
+def find_entities(text, pattern, seed_labels):
+    return [[m.start(), m.end(), seed_label(m.group(), seed_labels)] for m in pattern.finditer(text)]
+
+
+_worker_state = {}
+
+
+def _init_worker(seed_labels):
+    _worker_state['labels'] = seed_labels
+    _worker_state['pattern'] = compile_seed_pattern(seed_labels)
+
+
+def _match_chunk(texts):
+    return [find_entities(text, _worker_state['pattern'], _worker_state['labels']) for text in texts]
+
+
+def merge_predictions(seed_ents, predicted):
+    """Add model-predicted spans that do not overlap a seed match."""
+    ents = list(seed_ents)
+    for span in predicted:
+        s, e = span['start'], span['end']
+        if all(e <= a or s >= b for a, b, _ in seed_ents):
+            ents.append([s, e, span['label'] or "SKILL"])
+    return sorted(ents)
+
+
+def iter_predicted_spans(texts, nlp, clf, batch_size: int = 64, n_process: int = 1):
+    """Yield every SKILL entity of every text as a labelled span, in input order.
+
+    Unlike extraction, repeated mentions are kept: annotators need a
+    pre-label on each occurrence, like the seed matches get.
+    """
+    group = []
+    for ents in iter_doc_ents(texts, nlp, batch_size, n_process):
+        group.append([
+            {'span': text, 'start': start, 'end': end, 'label': skill_type}
+            for start, end, label, text, skill_type in ents if label.upper() == 'SKILL'
+        ])
+        if len(group) >= batch_size:
+            label_spans([s for spans in group for s in spans], clf)
+            yield from group
+            group = []
+    if group:
+        label_spans([s for spans in group for s in spans], clf)
+        yield from group
+
+
+def iter_chunks(records, size):
+    it = iter(records)
+    while True:
+        chunk = [text for _, text in itertools.islice(it, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_seed_matches(chunks, seed_labels, n_workers):
+    """Yield (text, seed entities) for every text of every chunk, in order."""
+    if n_workers <= 1:
+        _init_worker(seed_labels)
+        for chunk in chunks:
+            yield from zip(chunk, _match_chunk(chunk))
+        return
+
+    # Keep a bounded number of chunks in flight so memory stays flat
+    with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(seed_labels,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_match_chunk, chunk)))
+            if len(pending) >= 2 * n_workers:
+                chunk, fut = pending.popleft()
+                yield from zip(chunk, fut.result())
+        while pending:
+            chunk, fut = pending.popleft()
+            yield from zip(chunk, fut.result())
+
 
-# Load your JD CSV
-df = pd.read_csv("data/job_description.csv")  # must have 'description' column
+def main(args):
+    seed_labels = load_seed_labels(args.technical_seed, args.soft_seed)
 
-# Load seed lists
-technical = [s.lower().strip() for s in pd.read_csv("data/technical_skills.csv", header=None)[0]]
-soft = [s.lower().strip() for s in pd.read_csv("data/soft_skills.csv", header=None)[0]]
+    start = time.perf_counter()
+    n = 0
+    with open(args.csv, "r", encoding="utf-8", errors="ignore", newline="") as fin, \
+            open(args.out, "w", encoding="utf-8") as fout:
+        chunks = iter_chunks(iter_csv_records(fin, args.column), args.chunksize)
+        matches = iter_seed_matches(chunks, seed_labels, args.n_workers)
 
-# Precompile regex
-tech_pattern = re.compile(r'\b(' + '|'.join(map(re.escape, technical)) + r')\b', flags=re.IGNORECASE)
-soft_pattern = re.compile(r'\b(' + '|'.join(map(re.escape, soft)) + r')\b', flags=re.IGNORECASE)
+        if args.ner:
+            # One streaming nlp.pipe over all records, so --n_process starts
+            # its worker pool once
+            nlp, clf = load_models(args.ner, args.clf)
+            matches, texts = itertools.tee(matches)
+            texts = (text for text, _ in texts)
+            predicted = iter_predicted_spans(texts, nlp, clf, batch_size=args.batch_size, n_process=args.n_process)
+            annotated = (
+                (text, merge_predictions(ents, spans)) for (text, ents), spans in zip(matches, predicted)
+            )
+        else:
+            annotated = ((text, sorted(ents)) for text, ents in matches)
 
-def find_entities(text, pattern, label):
-    return [[m.start(), m.end(), label] for m in pattern.finditer(text)]
+        for text, ents in annotated:
+            fout.write(json.dumps({"text": text, "label": ents}) + "\n")
+            n += 1
+            if n % args.chunksize == 0:
+                print(f"{n} docs ({n / (time.perf_counter() - start):.1f} docs/sec)")
 
-jsonl_data = []
+    print(f"✅ Saved {n} pre-annotated docs to {args.out}")
 
-for _, row in df.iterrows():
-    text = str(row['description'])
-    ents = find_entities(text, tech_pattern, "technical") + find_entities(text, soft_pattern, "soft")
-    jsonl_data.append({"text": text, "label": ents})
 
-with open("data/job_description_preannotated.jsonl", "w", encoding="utf-8") as f:
-    for item in jsonl_data:
-        f.write(json.dumps(item) + "\n")
\ No newline at end of file
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Pre-annotate job descriptions for Doccano")
+    p.add_argument("--csv", default="data/job_description.csv")
+    p.add_argument("--column", default="description")
+    p.add_argument("--out", default="data/job_description_preannotated.jsonl")
+    p.add_argument("--technical_seed", default="data/technical_skills.csv")
+    p.add_argument("--soft_seed", default="data/soft_skills.csv")
+    p.add_argument("--chunksize", type=int, default=1000, help="rows per chunk / worker task")
+    p.add_argument("--n_workers", type=int, default=1, help="processes for seed matching")
+    p.add_argument("--ner", help="optional spaCy model dir to pre-fill NER predictions")
+    p.add_argument("--clf", help="optional skill classifier to label NER predictions")
+    p.add_argument("--batch_size", type=int, default=64)
+    p.add_argument("--n_process", type=int, default=1, help="processes for nlp.pipe")
+    args = p.parse_args()
+    main(args)
@@ -1,34 +1,135 @@
+import hashlib
+import threading
+import weakref
 import spacy
 import joblib
 from pathlib import Path
+from src.cache import LabelCache, LRUCache, ResultCache
+from src.chunking import chunk_text, iter_segments, merge_overlapping
+from src.fast_classifier import NumpyClassifier, export_path_for
+from src.gazetteer import add_gazetteer, gazetteer_digest, load_gazetteer
+from src.label_index import IndexedClassifier, LabelIndex, index_path_for, normalize_span
+from src.metrics import METRICS
 
-def load_models(ner_model_path: str = None, classifier_path: str = None):
-    # Load spaCy NER model
-    if ner_model_path:
-        nlp = spacy.load(ner_model_path)
+STOP_WORD_SKILLS = {
+    "ability", "experience", "knowledge", "skills", "attitude",
+    "team", "teams", "environment", "development"
+}
+
+# Surface forms like "Python" or "SQL" recur in nearly every posting, so
+# classifier labels are cached per normalized span, in one cache per
+# classifier object (dropped together with the classifier).
+SPAN_LABEL_CACHE_SIZE = 10_000
+_LABEL_CACHES = weakref.WeakKeyDictionary()
+_LABEL_CACHES_LOCK = threading.Lock()
+
+# Raw entities of each paragraph keyed by (paragraph text, model version),
+# so resubmitting an edited posting only re-runs the changed paragraphs.
+PARAGRAPH_CACHE = LRUCache(maxsize=100_000)
+
+# Texts longer than this are split into overlapping chunks on line
+# boundaries; typical postings are well below it and run unchunked.
+MAX_CHUNK_CHARS = 10_000
+CHUNK_OVERLAP = 200
+
+# "ner": trained tok2vec+ner pipeline. "gazetteer": phrase matching against
+# the seed lists and data/spans.csv only. "hybrid": gazetteer first, NER
+# fills in the gaps.
+EXTRACTION_MODES = ("ner", "gazetteer", "hybrid")
+
+
+def load_models(ner_model_path: str = None, classifier_path: str = None, mode: str = "ner",
+                exclude=(), disable=()):
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode {mode!r}, expected one of {EXTRACTION_MODES}")
+
+    # Load spaCy NER model; `exclude`/`disable` trim unused components
+    if mode == "gazetteer":
+        nlp = spacy.blank("en")
     else:
-        nlp = spacy.load("en_core_web_sm")
+        nlp = spacy.load(ner_model_path or "en_core_web_sm", exclude=list(exclude), disable=list(disable))
+
+    if mode != "ner":
+        gazetteer = load_gazetteer()
+        add_gazetteer(nlp, gazetteer, before="ner" if "ner" in nlp.pipe_names else None)
+        nlp.meta["gazetteer_digest"] = gazetteer_digest(gazetteer)
+    nlp.meta["extraction_mode"] = mode
+    nlp.meta["trimmed"] = {"exclude": sorted(exclude), "disable": sorted(disable)}
 
-    # Load classifier
-    clf = joblib.load(classifier_path) if classifier_path and Path(classifier_path).exists() else None
+    # Load classifier, preferring the NumPy export written next to the joblib
+    # model by train_classifier (no sklearn import or unpickling)
+    clf = None
+    if classifier_path and export_path_for(classifier_path).exists():
+        clf = NumpyClassifier(export_path_for(classifier_path))
+    elif classifier_path and Path(classifier_path).exists():
+        clf = joblib.load(classifier_path)
+
+    # Exact-match label index written by train_classifier, if present
+    if clf is not None and index_path_for(classifier_path).exists():
+        clf = IndexedClassifier(clf, LabelIndex(index_path_for(classifier_path)))
     return nlp, clf
 
-def extract_and_label(text: str, nlp, clf):
-    doc = nlp(text)
 
-    STOP_WORD_SKILLS = {
-        "ability", "experience", "knowledge", "skills", "attitude",
-        "team", "teams", "environment", "development"
-    }
+def _digest_path(path) -> str:
+    h = hashlib.sha1()
+    path = Path(path)
+    for f in sorted(p for p in ([path] if path.is_file() else path.rglob("*")) if p.is_file()):
+        h.update(str(f.relative_to(path) if f != path else f.name).encode("utf-8"))
+        h.update(f.read_bytes())
+    return h.hexdigest()[:12]
+
+
+def model_version(nlp, classifier_path: str = None, ner_model_path: str = None) -> str:
+    """Identify the NER pipeline and classifier file that produce results.
+
+    Trained pipelines usually all carry the default meta name/version, so
+    the model directory's contents are hashed in when `ner_model_path` is given.
+    In gazetteer/hybrid mode the phrases loaded from the seed lists and
+    spans.csv are part of the version too, as are excluded/disabled
+    components.
+    """
+    mode = nlp.meta.get("extraction_mode", "ner")
+    version = f"{nlp.meta.get('name', 'pipeline')}-{nlp.meta.get('version', '0')}"
+    if mode != "gazetteer" and ner_model_path and Path(ner_model_path).exists():
+        version += f"+ner-{_digest_path(ner_model_path)}"
+    if classifier_path and Path(classifier_path).exists():
+        version += f"+clf-{_digest_path(classifier_path)}"
+    if mode != "ner":
+        version += f"+{mode}"
+        if nlp.meta.get("gazetteer_digest"):
+            version += f"-{nlp.meta['gazetteer_digest']}"
+    trimmed = nlp.meta.get("trimmed", {})
+    for key in ("exclude", "disable"):
+        if trimmed.get(key):
+            version += f"+{key}-{'.'.join(trimmed[key])}"
+    return version
+
+
+def doc_ents(doc, offset: int = 0):
+    """Return (start, end, label, text, skill type) tuples for the entities of a doc.
+
+    `offset` shifts the character offsets, e.g. for a chunk of a longer text.
+    The skill type is preset for gazetteer matches and None otherwise.
+    """
+    return [
+        (offset + ent.start_char, offset + ent.end_char, ent.label_, ent.text, ent.ent_id_ or None)
+        for ent in doc.ents
+    ]
 
+
+def dedupe_spans(ents):
+    """Return the deduplicated SKILL spans of an entity list.
+
+    Only gazetteer matches carry a label at this point.
+    """
     seen = set()
-    skills = []
+    spans = []
 
-    for ent in doc.ents:
-        if ent.label_.upper() != 'SKILL':
+    for start, end, ent_label, ent_text, skill_type in ents:
+        if ent_label.upper() != 'SKILL':
             continue
 
-        span_text = ent.text.strip()
+        span_text = ent_text.strip()
         norm = span_text.lower()
 
         # Skip generic bad words
@@ -40,17 +141,194 @@ def extract_and_label(text: str, nlp, clf):
             continue
         seen.add(norm)
 
-        # Classifier label
-        label = clf.predict([span_text])[0] if clf else None
-
-        skills.append({
+        spans.append({
             'span': span_text,
-            'start': ent.start_char,
-            'end': ent.end_char,
-            'label': label
+            'start': start,
+            'end': end,
+            'label': skill_type
         })
 
-    return skills
+    return spans
+
+
+def collect_spans(doc):
+    """Return the deduplicated SKILL spans of a doc."""
+    return dedupe_spans(doc_ents(doc))
+
+
+def label_cache_for(clf) -> LabelCache:
+    """Return the span label cache belonging to `clf`, creating it on first use."""
+    with _LABEL_CACHES_LOCK:
+        cache = _LABEL_CACHES.get(clf)
+        if cache is None:
+            cache = _LABEL_CACHES[clf] = LabelCache(maxsize=SPAN_LABEL_CACHE_SIZE)
+        return cache
+
+
+def label_spans(spans, clf, cache: LabelCache = None, use_cache: bool = True):
+    """Fill in the classifier label of every unlabelled span with a single predict call.
+
+    `spans` may come from several documents; spans missing from the cache
+    are sent to the classifier as one batch so the TF-IDF transform and
+    LogisticRegression run once. The cache defaults to `clf`'s own
+    (`label_cache_for`); pass `use_cache=False` to bypass it.
+    Spans already labelled by the gazetteer are left untouched.
+    """
+    pending = [s for s in spans if s['label'] is None]
+    if clf is None or not pending:
+        return spans
+
+    if not use_cache:
+        cache = None
+    elif cache is None:
+        cache = label_cache_for(clf)
+
+    keys = [normalize_span(s['span']) for s in pending]
+    labels = {}
+    missing = {}
+    for key, span in zip(keys, pending):
+        if key in labels or key in missing:
+            continue
+        label = cache.get(key) if cache is not None else None
+        if label is None:
+            missing[key] = span['span']
+        else:
+            labels[key] = label
+
+    METRICS.inc("skill_entities_total", len(pending))
+    if missing:
+        with METRICS.stage("classifier"):
+            predicted = clf.predict(list(missing.values()))
+        for key, label in zip(missing, predicted):
+            labels[key] = label
+            if cache is not None:
+                cache.put(key, label)
+
+    for key, span in zip(keys, pending):
+        span['label'] = labels[key]
+    return spans
+
+
+def _iter_pieces(texts, max_chars: int, overlap: int):
+    # Yield (piece, (doc index, offset, is last piece)) for nlp.pipe(as_tuples=True)
+    for i, text in enumerate(texts):
+        chunks = chunk_text(text, max_chars, overlap) if len(text) > max_chars else None
+        if not chunks:
+            yield text, (i, 0, True)
+            continue
+        for n, (start, end) in enumerate(chunks):
+            yield text[start:end], (i, start, n == len(chunks) - 1)
+
+
+def _profiled_pipe(nlp, pieces, batch_size: int):
+    """`nlp.pipe(pieces, as_tuples=True)` that times the tokenizer and each
+    pipeline component per batch. Only used while METRICS is enabled."""
+    for batch in spacy.util.minibatch(pieces, batch_size):
+        texts, contexts = zip(*batch)
+        with METRICS.stage("tokenizer"):
+            docs = [nlp.make_doc(text) for text in texts]
+        for name, proc in nlp.pipeline:
+            with METRICS.stage(name):
+                if hasattr(proc, "pipe"):
+                    docs = list(proc.pipe(docs, batch_size=batch_size))
+                else:
+                    docs = [proc(doc) for doc in docs]
+        METRICS.inc("skill_docs_total", len(docs))
+        METRICS.inc("skill_tokens_total", sum(len(doc) for doc in docs))
+        yield from zip(docs, contexts)
+
+
+def iter_doc_ents(texts, nlp, batch_size: int = 64, n_process: int = 1,
+                  max_chars: int = MAX_CHUNK_CHARS, overlap: int = CHUNK_OVERLAP):
+    """Yield the entity tuples of every text, in input order.
+
+    Texts longer than `max_chars` are split into overlapping chunks on line
+    boundaries; the chunks run through `nlp.pipe` in the same batches as the
+    other texts and their entities are mapped back to document offsets.
+    """
+    pieces = _iter_pieces(texts, max_chars, overlap)
+    if METRICS.enabled and n_process == 1:
+        docs = _profiled_pipe(nlp, pieces, batch_size)
+    else:
+        docs = nlp.pipe(pieces, as_tuples=True, batch_size=batch_size, n_process=n_process)
+
+    ents = []
+    for doc, (_, offset, last) in docs:
+        ents.extend(doc_ents(doc, offset))
+        if last:
+            yield merge_overlapping(ents)
+            ents = []
+
+
+def extract_and_label(text: str, nlp, clf, max_chars: int = MAX_CHUNK_CHARS,
+                      overlap: int = CHUNK_OVERLAP):
+    if len(text) <= max_chars:
+        if METRICS.enabled:
+            doc, _ = next(_profiled_pipe(nlp, [(text, None)], 1))
+        else:
+            doc = nlp(text)
+        return label_spans(collect_spans(doc), clf)
+
+    ents = next(iter_doc_ents([text], nlp, max_chars=max_chars, overlap=overlap))
+    return label_spans(dedupe_spans(ents), clf)
+
+
+def extract_incremental(text: str, nlp, clf, version: str, cache: LRUCache = PARAGRAPH_CACHE,
+                        batch_size: int = 64, max_chars: int = MAX_CHUNK_CHARS,
+                        overlap: int = CHUNK_OVERLAP):
+    """Extract skills paragraph by paragraph, reusing cached paragraph entities.
+
+    Each non-blank line runs through `nlp` on its own, so results can
+    differ slightly from `extract_and_label` on the whole text. Only
+    paragraphs missing from `cache` for this model `version` go
+    through `nlp.pipe`. Their entities are shifted back to document offsets
+    and deduplicated and labelled exactly like `extract_and_label`.
+    """
+    segments = list(iter_segments(text))
+    keys = [ResultCache.key(text[start:end], version) for start, end in segments]
+    para_ents = [cache.get(key) if cache is not None else None for key in keys]
+
+    misses = [i for i, ents in enumerate(para_ents) if ents is None]
+    if misses:
+        paragraphs = [text[segments[i][0]:segments[i][1]] for i in misses]
+        for i, ents in zip(misses, iter_doc_ents(paragraphs, nlp, batch_size, 1, max_chars, overlap)):
+            para_ents[i] = ents
+            if cache is not None:
+                cache.put(keys[i], ents)
+    METRICS.inc("skill_paragraphs_total", len(segments) - len(misses), cached="true")
+    METRICS.inc("skill_paragraphs_total", len(misses), cached="false")
+
+    ents = [
+        (start + s, start + e, *rest)
+        for (start, _), para in zip(segments, para_ents)
+        for s, e, *rest in para
+    ]
+    return label_spans(dedupe_spans(ents), clf)
+
+
+def iter_extract_batch(texts, nlp, clf, batch_size: int = 64, n_process: int = 1,
+                       max_chars: int = MAX_CHUNK_CHARS, overlap: int = CHUNK_OVERLAP):
+    """Yield the skills of every text, in input order.
+
+    Texts are streamed through `nlp.pipe`, and the spans of each group of
+    `batch_size` documents are labelled with a single classifier call.
+    """
+    group = []
+    for ents in iter_doc_ents(texts, nlp, batch_size, n_process, max_chars, overlap):
+        group.append(dedupe_spans(ents))
+        if len(group) >= batch_size:
+            label_spans([s for spans in group for s in spans], clf)
+            yield from group
+            group = []
+
+    if group:
+        label_spans([s for spans in group for s in spans], clf)
+        yield from group
+
+
+def extract_batch(texts, nlp, clf, batch_size: int = 64, n_process: int = 1,
+                  max_chars: int = MAX_CHUNK_CHARS, overlap: int = CHUNK_OVERLAP):
+    return list(iter_extract_batch(texts, nlp, clf, batch_size, n_process, max_chars, overlap))
 
 
 if __name__ == "__main__":
@@ -58,8 +336,35 @@ if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--ner", default="/training/model-best", help="trained spaCy model dir")
     p.add_argument("--clf", required=True, help="skill classifier joblib")
-    p.add_argument("--text", required=True)
+    p.add_argument("--mode", choices=EXTRACTION_MODES, default="ner", help="extraction mode")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--text")
+    src.add_argument("--input", help="CSV, JSONL or plain-text corpus for bulk extraction")
+    p.add_argument("--output", help="JSONL results file (bulk mode)")
+    p.add_argument("--column", help="CSV column / JSONL field holding the text")
+    p.add_argument("--format", choices=["csv", "jsonl", "text"], help="input format (default: from extension)")
+    p.add_argument("--batch_size", type=int, default=64)
+    p.add_argument("--n_process", type=int, default=1)
+    p.add_argument("--checkpoint", help="checkpoint file to resume an interrupted bulk run")
+    p.add_argument("--profile", action="store_true", help="print per-stage timings when done")
     args = p.parse_args()
-    nlp, clf = load_models(args.ner, args.clf)
-    res = extract_and_label(args.text, nlp, clf)
-    print(json.dumps(res, indent=2))
\ No newline at end of file
+    METRICS.enabled = args.profile
+    nlp, clf = load_models(args.ner, args.clf, mode=args.mode)
+
+    if args.input:
+        from src.bulk import run_bulk
+        if not args.output:
+            p.error("--output is required with --input")
+        run_bulk(
+            args.input, args.output, nlp, clf,
+            column=args.column, fmt=args.format,
+            batch_size=args.batch_size, n_process=args.n_process,
+            checkpoint_path=args.checkpoint,
+        )
+    else:
+        res = extract_and_label(args.text, nlp, clf)
+        print(json.dumps(res, indent=2))
+
+    if args.profile:
+        import sys
+        print(METRICS.format_summary(), file=sys.stderr)
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from src.predict import extract_batch, label_cache_for, load_models, model_version
+from src.samples import SAMPLE_JOB_DESCRIPTIONS
+
+
+class LoadedModel:
+    """An NER pipeline + classifier pair, the version string it reports and
+    the span label cache that belongs to this classifier only."""
+
+    def __init__(self, nlp, clf, version, ner_path, clf_path, load_seconds):
+        self.nlp = nlp
+        self.clf = clf
+        self.version = version
+        self.ner_path = ner_path
+        self.clf_path = clf_path
+        self.load_seconds = load_seconds
+        self.label_cache = label_cache_for(clf) if clf is not None else None
+
+
+class ModelRegistry:
+    """Holds the model currently serving requests.
+
+    Models are loaded and warmed up off the request path (lazily or in a
+    background thread) and then swapped in with a single reference
+    assignment. Requests keep the LoadedModel they started with, so
+    in-flight work finishes on the old model while new requests get the
+    new one.
+    """
+
+    def __init__(self, ner_path, clf_path, mode: str = "ner", exclude=(), disable=(),
+                 warmup_texts=SAMPLE_JOB_DESCRIPTIONS):
+        self.ner_path = ner_path
+        self.clf_path = clf_path
+        self.mode = mode
+        self.exclude = tuple(exclude)
+        self.disable = tuple(disable)
+        self.warmup_texts = list(warmup_texts)
+        self.error = None
+        self._current = None
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+
+    @property
+    def current(self):
+        """The serving model, or None while nothing is loaded; never blocks."""
+        return self._current
+
+    @property
+    def ready(self):
+        return self._current is not None
+
+    def load(self, ner_path: str = None, clf_path: str = None) -> LoadedModel:
+        """Load, warm up and swap in a model; defaults to the last paths used."""
+        with self._load_lock:
+            ner_path = ner_path or self.ner_path
+            clf_path = clf_path or self.clf_path
+            start = time.perf_counter()
+            try:
+                nlp, clf = load_models(
+                    ner_path, clf_path, mode=self.mode,
+                    exclude=self.exclude, disable=self.disable,
+                )
+                if self.warmup_texts:
+                    extract_batch(self.warmup_texts, nlp, clf)
+            except Exception as exc:
+                self.error = exc
+                self._ready.set()
+                raise
+
+            model = LoadedModel(
+                nlp, clf, model_version(nlp, clf_path, ner_path), ner_path, clf_path,
+                time.perf_counter() - start,
+            )
+            self.ner_path, self.clf_path = ner_path, clf_path
+            self._current = model
+            self.error = None
+            self._ready.set()
+            return model
+
+    def _claim_start(self):
+        with self._start_lock:
+            first = not self._started
+            self._started = True
+        return first
+
+    def load_in_background(self, ner_path: str = None, clf_path: str = None):
+        self._claim_start()
+        thread = threading.Thread(
+            target=self._load_quietly, args=(ner_path, clf_path),
+            name="model-loader", daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _load_quietly(self, ner_path, clf_path):
+        try:
+            self.load(ner_path, clf_path)
+        except Exception:
+            pass  # kept in self.error and reported by get()/status()
+
+    def get(self, timeout: float = None) -> LoadedModel:
+        """Return the serving model, loading it first if nothing started to."""
+        if self._current is not None:
+            return self._current
+        if self._claim_start():
+            self._load_quietly(None, None)
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Model is still loading")
+        if self._current is None:
+            raise RuntimeError(f"Model failed to load: {self.error}")
+        return self._current
+
+    def status(self):
+        model = self._current
+        return {
+            "ready": model is not None,
+            "mode": self.mode,
+            "version": model.version if model else None,
+            "ner_path": model.ner_path if model else self.ner_path,
+            "clf_path": model.clf_path if model else self.clf_path,
+            "load_seconds": model.load_seconds if model else None,
+            "exclude": list(self.exclude),
+            "disable": list(self.disable),
+            "error": str(self.error) if self.error else None,
+        }
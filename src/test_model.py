@@ -1,6 +1,7 @@
 import spacy
 from pathlib import Path
 import joblib
+from src.samples import SAMPLE_JOB_DESCRIPTIONS
 
 def test_model(
     model_dir: str = "training/model-last",
@@ -28,26 +29,22 @@ def test_model(
 
     print("\n🔍 Testing the model on sample job descriptions...\n")
 
-    samples = [
-        "Experience: 2-5 years\n\nJob Location:- Aurangabad/Pune\n\nVacancies:- 02\n\nNote: Fresher Do Not Apply\n\nJob Description\n\nLooking for experienced developers who are passionate to work with an IT / Software Development company.\n\nBasic Requirements:\nHaving prior working experience on WordPress\nShould be proficient verbally and written communication skills.\nShould be capable of writing an efficient code using best software development with good coding practices.\nAble to integrate data from various back-end services and databases.\nAble to integrate with external application ERP/CRM\nShould be capable of working on Payment gateway integration on multiple platforms\nShould have adequate knowledge of relational database systems and Object Oriented Programming.\nHands on experience required upon web applications including Security and session management.\nCapable of self- upgrading upon emerging new technologies and apply them into operations and activities.\nAble to deliver projects before deadlines.\nAble to work on multiple Frameworks such as Zend etc. would be an added advantage\nResponsibilities and Duties\nShould be able to manage on handling Multiple Projects\nManage project independently\nManage clients\nAble to handle the team\nDeliver projects before deadlines.\nRequired Experience, Skills and Qualifications\n\n\u2022 WordPress\n\u2022 Plugin-in development\n\u2022 PHP\n\u2022 HTML/HTML5\n\u2022 Javascript/jQuery\n\u2022 Bootstrap\n\u2022 MySQL\n\nQualification:\n\u2022 UG: B.Sc (CS/CSC/IT), BCA, BCS, BE, B.Tech (CS/CSE/IT)\n\u2022 M.Sc (CS/CSC/IT), MCA, MCS, ME, M.Tech (CS/CSE/IT)",
-        "PYTHON/DJANGO (Developer/Lead) - Job Code(PDJ - 04)\nStrong Python experience in API development (REST/RPC).\nExperience working with API Frameworks (Django/flask).\nExperience evaluating and improving the efficiency of programs in a Linux environment.\nAbility to effectively handle multiple tasks with a high level of accuracy and attention to detail.\nGood verbal and written communication skills.\nWorking knowledge of SQL.\nJSON experience preferred.\nGood knowledge in automated unit testing using PyUnit.",
-        "Data Scientist (Contractor)\n\nBangalore, IN\n\nResponsibilities\n\nWe are looking for a capable data scientist to join the Analytics team, reporting locally in India Bangalore. This person\u2019s responsibilities include research, design and development of Machine Learning and Deep Learning algorithms to tackle a variety of Fraud oriented challenges. The data scientist will work closely with software engineers and program managers to deliver end-to-end products, including: data collection in big scale and analysis, exploring different algorithmic approaches, model development, assessment and validation \u2013 all the way through production.\n\nQualifications\n\nAt least 3 years of hands-on development of complex Machine Learning models using modern frameworks and tools, ideally Python based.\nSolid understanding of statistics and applied mathematics\nCreative thinker with a proven ability to tackle open problems and apply non-trivial solutions.\nExperience in software development using Python, Java or a similar language.\nAny Graduate or M.Sc. in Computer Science, Mathematics or equivalent, preferably in Machine Learning\nAbility to write clean and concise code\nQuick learner, independent, methodical, and detail oriented.\nTeam player, positive attitude, collaborative, good communication skills.\nDedicated, makes things happen.\nFlexible, capable of making decisions in an ambiguous and changing environment.\n\nAdvantages:\n\nPrior experience as a software developer or data engineer \u2013 advantage\nExperience with Big data \u2013 advantage\nExperience with Spark \u2013 big advantage\nExperience with Deep Learning frameworks (PyTorch, TensorFlow, Keras) \u2013 advantage.\nExperience in the Telecommunication domain and/or Fraud prevention - advantage"
-    ]
-
-    for text in samples:
+    for text in SAMPLE_JOB_DESCRIPTIONS:
         doc = nlp(text)
         print("Detected Skills:")
-        for ent in doc.ents:
-            label = ent.label_
-            skill_text = ent.text.strip()
-            skill_type = None
+        ents = list(doc.ents)
+        skill_texts = [ent.text.strip() for ent in ents]
+        skill_types = [None] * len(ents)
 
-            # Classify skill if classifier is available
-            if classifier:
-                try:
-                    skill_type = classifier.predict([skill_text])[0]
-                except Exception:
-                    skill_type = "Unknown"
+        # Classify all skills of the document in one call if classifier is available
+        if classifier and ents:
+            try:
+                skill_types = list(classifier.predict(skill_texts))
+            except Exception:
+                skill_types = ["Unknown"] * len(ents)
+
+        for ent, skill_text, skill_type in zip(ents, skill_texts, skill_types):
+            label = ent.label_
 
             # Display results neatly
             if skill_type:
@@ -58,8 +55,124 @@ def test_model(
         print("-" * 60)
 
 
+def test_numpy_classifier(
+    tmp_path,
+    classifier_path: str = "models/skill_classifier.joblib",
+    spans_csv: str = "data/spans.csv"
+):
+    """
+    Export the sklearn classifier to .npz and check that the NumPy predictor
+    gives the same label on every labelled span.
+    """
+    from src.fast_classifier import NumpyClassifier, export_pipeline
+    import pandas as pd
+    import pytest
+
+    if not Path(classifier_path).exists():
+        pytest.skip(f"No classifier found at {classifier_path}")
+
+    pipe = joblib.load(classifier_path)
+    export_path = Path(tmp_path) / "skill_classifier.npz"
+    export_pipeline(pipe, export_path)
+
+    texts = pd.read_csv(spans_csv)['text'].astype(str).tolist()
+    expected = pipe.predict(texts)
+    actual = NumpyClassifier(export_path).predict(texts)
+    mismatches = int((expected != actual).sum())
+    assert mismatches == 0, f"{mismatches} of {len(texts)} spans labelled differently"
+    print(f"✅ NumPy classifier matches sklearn on {len(texts)} spans")
+
+
+def _rule_based_nlp():
+    # Deterministic stand-in for the trained NER: tags the sample skills
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "SKILL", "pattern": [{"LOWER": w} for w in skill.split()]}
+        for skill in ("python", "java", "machine learning", "deep learning", "sql",
+                      "communication", "wordpress", "php", "mysql", "spark", "kubernetes")
+    ])
+    return nlp
+
+
+class _LengthClassifier:
+    """Stub skill classifier; predict() raises when it sees `fail_on`."""
+
+    def __init__(self, fail_on: str = None):
+        self.fail_on = fail_on
+
+    def predict(self, texts):
+        if self.fail_on is not None and self.fail_on in texts:
+            raise RuntimeError("simulated crash")
+        return ["technical" if len(t) < 8 else "soft" for t in texts]
+
+
+def test_chunked_entities():
+    """
+    Splitting a long posting into small overlapping chunks must find the
+    same entities, at the same offsets, as running it whole.
+    """
+    from src.predict import iter_doc_ents
+
+    nlp = _rule_based_nlp()
+    text = "\n".join(SAMPLE_JOB_DESCRIPTIONS * 3)
+    whole = next(iter_doc_ents([text], nlp, max_chars=len(text)))
+    chunked = next(iter_doc_ents([text], nlp, max_chars=300, overlap=80))
+    assert whole, "the rule-based pipeline found no entities"
+    assert chunked == whole
+    print(f"✅ Chunked extraction matches the whole document ({len(whole)} entities)")
+
+
+def test_bulk_resume(tmp_path):
+    """
+    A bulk run interrupted mid-way and resumed from its checkpoint must
+    write exactly what an uninterrupted run writes.
+    """
+    import json
+    import pytest
+    from src.bulk import run_bulk
+
+    tmp_path = Path(tmp_path)
+    corpus = tmp_path / "corpus.jsonl"
+    with open(corpus, "w", encoding="utf-8") as f:
+        for i in range(30):
+            text = SAMPLE_JOB_DESCRIPTIONS[i % 3] + ("\nKubernetes" if i == 21 else "")
+            f.write(json.dumps({"id": i, "text": text}) + "\n")
+    nlp = _rule_based_nlp()
+
+    expected = tmp_path / "expected.jsonl"
+    run_bulk(corpus, expected, nlp, _LengthClassifier(), batch_size=4, log_every=0)
+
+    out, ckpt = tmp_path / "out.jsonl", tmp_path / "out.ckpt"
+    with pytest.raises(RuntimeError):
+        run_bulk(corpus, out, nlp, _LengthClassifier(fail_on="Kubernetes"), batch_size=4,
+                 checkpoint_path=ckpt, checkpoint_every=4, log_every=0)
+    assert 0 < json.loads(ckpt.read_text())["done"] < 30
+
+    run_bulk(corpus, out, nlp, _LengthClassifier(), batch_size=4, checkpoint_path=ckpt, log_every=0)
+    assert out.read_text() == expected.read_text()
+
+    # Output deleted after the checkpoint: start over rather than skip rows
+    out.unlink()
+    run_bulk(corpus, out, nlp, _LengthClassifier(), batch_size=4, checkpoint_path=ckpt, log_every=0)
+    assert out.read_text() == expected.read_text()
+
+    # A checkpoint of another corpus is refused
+    other = tmp_path / "other.jsonl"
+    other.write_text(corpus.read_text())
+    with pytest.raises(ValueError):
+        run_bulk(other, out, nlp, _LengthClassifier(), checkpoint_path=ckpt, log_every=0)
+    print("✅ Bulk run resumes from its checkpoint without losing or repeating records")
+
+
 if __name__ == "__main__":
+    import tempfile
     test_model()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_numpy_classifier(tmp_dir)
+    test_chunked_entities()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_bulk_resume(tmp_dir)
 
 '''
 Data Scientist (Contractor)\n\nBangalore, IN\n\nResponsibilities\n\nWe are looking for a capable data scientist to join the Analytics team, reporting locally in India Bangalore. This person\u2019s responsibilities include research, design and development of Machine Learning and Deep Learning algorithms to tackle a variety of Fraud oriented challenges. The data scientist will work closely with software engineers and program managers to deliver end-to-end products, including: data collection in big scale and analysis, exploring different algorithmic approaches, model development, assessment and validation \u2013 all the way through production.\n\nQualifications\n\nAt least 3 years of hands-on development of complex Machine Learning models using modern frameworks and tools, ideally Python based.\nSolid understanding of statistics and applied mathematics\nCreative thinker with a proven ability to tackle open problems and apply non-trivial solutions.\nExperience in software development using Python, Java or a similar language.\nAny Graduate or M.Sc. in Computer Science, Mathematics or equivalent, preferably in Machine Learning\nAbility to write clean and concise code\nQuick learner, independent, methodical, and detail oriented.\nTeam player, positive attitude, collaborative, good communication skills.\nDedicated, makes things happen.\nFlexible, capable of making decisions in an ambiguous and changing environment.\n\nAdvantages:\n\nPrior experience as a software developer or data engineer \u2013 advantage\nExperience with Big data \u2013 advantage\nExperience with Spark \u2013 big advantage\nExperience with Deep Learning frameworks (PyTorch, TensorFlow, Keras) \u2013 advantage.\nExperience in the Telecommunication domain and/or Fraud prevention - advantage
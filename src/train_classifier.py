@@ -1,11 +1,32 @@
 import argparse
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import GridSearchCV, train_test_split
 from sklearn.metrics import classification_report
 import joblib
+from src.data_prep import is_dev_example
+from src.fast_classifier import NumpyClassifier, export_path_for, export_pipeline
+from src.label_index import LabelIndex, count_labels, index_path_for, save_label_index
+
+CLASSES = ['soft', 'technical']
+TEST_RATIO = 0.15
+
+# Searched on a sample of the spans with --search
+PARAM_GRID = {
+    'hash__ngram_range': [(1, 1), (1, 2)],
+    'clf__alpha': [1e-6, 1e-5, 1e-4],
+}
+
+
+def save_index(counts, model_out, source):
+    # Exact-match lookup of every labelled span, consulted before the model
+    index_dir = index_path_for(model_out)
+    meta = save_label_index(counts, index_dir, source=str(source))
+    print(f"Saved label index to {index_dir} ({meta['n_entries']} spans, "
+          f"{meta['n_conflicting']} with conflicting labels)")
+
 
 def main(args):
     spans = pd.read_csv(args.spans_csv)
@@ -18,7 +39,7 @@ def main(args):
     X = spans['text'].astype(str)
     y = spans['label']
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.15, random_state=42, stratify=y)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_RATIO, random_state=42, stratify=y)
 
     pipe = Pipeline([
         ('tfidf', TfidfVectorizer(ngram_range=(1,2), max_features=5000)),
@@ -31,10 +52,123 @@ def main(args):
     joblib.dump(pipe, args.model_out)
     print(f"Saved classifier to {args.model_out}")
 
+    # Compact export for NumPy-only inference; refuse to ship it if it
+    # disagrees with the sklearn pipeline on any labelled span
+    export_out = export_path_for(args.model_out)
+    export_pipeline(pipe, export_out)
+    mismatches = (NumpyClassifier(export_out).predict(X) != pipe.predict(X)).sum()
+    if mismatches:
+        export_out.unlink()
+        raise RuntimeError(f"NumPy export disagrees with sklearn on {mismatches} spans; not saved")
+    print(f"Saved NumPy classifier export to {export_out}")
+
+    save_index(count_labels(X, y), args.model_out, args.spans_csv)
+
+
+def iter_span_chunks(spans_csv, chunksize=50_000, seed=42):
+    """Yield (texts, labels) for the technical/soft spans of a CSV, chunk by chunk.
+
+    Rows are shuffled within each chunk so SGD does not see long runs of
+    one label when the file is sorted.
+    """
+    for chunk in pd.read_csv(spans_csv, chunksize=chunksize):
+        chunk = chunk[chunk['label'].isin(CLASSES)]
+        if chunk.empty:
+            continue
+        chunk = chunk.sample(frac=1.0, random_state=seed)
+        yield chunk['text'].astype(str), chunk['label']
+
+
+def build_incremental_pipeline(ngram_range=(1, 2), alpha=1e-5, n_features=2**20):
+    # The hashing vectorizer is stateless, so new spans never need a refit
+    # of the vocabulary and partial_fit can continue from a saved model
+    return Pipeline([
+        ('hash', HashingVectorizer(ngram_range=ngram_range, n_features=n_features, alternate_sign=False)),
+        ('clf', SGDClassifier(loss='log_loss', alpha=alpha, random_state=42)),
+    ])
+
+
+def search_params(spans_csv, sample_size, chunksize, cv=3):
+    """Cross-validated grid search over PARAM_GRID on the first `sample_size` spans, on all cores."""
+    X, y = [], []
+    for texts, labels in iter_span_chunks(spans_csv, chunksize):
+        X.extend(texts)
+        y.extend(labels)
+        if len(X) >= sample_size:
+            break
+    X, y = X[:sample_size], y[:sample_size]
+
+    search = GridSearchCV(build_incremental_pipeline(), PARAM_GRID, cv=cv, scoring='f1_macro', n_jobs=-1)
+    search.fit(X, y)
+    print(f"Best params on {len(X)} spans: {search.best_params_} (f1_macro {search.best_score_:.3f})")
+    return search.best_params_
+
+
+def main_incremental(args):
+    if args.update:
+        pipe = joblib.load(args.update)
+        vec, clf = pipe.steps[0][1], pipe.steps[-1][1]
+        if not isinstance(vec, HashingVectorizer) or not hasattr(clf, 'partial_fit'):
+            raise ValueError(f"{args.update} is not an incremental (hashing + SGD) classifier; retrain it with --incremental")
+        print(f"Updating {args.update} with spans from {args.spans_csv}")
+    else:
+        pipe = build_incremental_pipeline()
+        if args.search:
+            pipe.set_params(**search_params(args.spans_csv, args.search_sample, args.chunksize))
+        vec, clf = pipe.steps[0][1], pipe.steps[-1][1]
+
+    # Extend the existing label index rather than rebuilding it from all spans
+    counts = {}
+    if args.update and index_path_for(args.update).exists():
+        counts = LabelIndex(index_path_for(args.update), mmap=False).label_counts()
+
+    n_train = 0
+    for epoch in range(args.epochs):
+        for texts, labels in iter_span_chunks(args.spans_csv, args.chunksize, seed=42 + epoch):
+            if epoch == 0:
+                count_labels(texts, labels, counts)
+            train = ~texts.map(lambda t: is_dev_example(t, TEST_RATIO))
+            if train.any():
+                clf.partial_fit(vec.transform(texts[train]), labels[train], classes=CLASSES)
+                n_train += int(train.sum())
+    if not n_train:
+        raise ValueError("No labeled spans for classifier training. Provide labeled skill spans (technical/soft).")
+
+    y_test, preds = [], []
+    for texts, labels in iter_span_chunks(args.spans_csv, args.chunksize):
+        test = texts.map(lambda t: is_dev_example(t, TEST_RATIO))
+        if test.any():
+            y_test.extend(labels[test])
+            preds.extend(pipe.predict(texts[test]))
+    if y_test:
+        print(classification_report(y_test, preds))
+
+    joblib.dump(pipe, args.model_out)
+    print(f"Saved incremental classifier to {args.model_out}")
+
+    # Hashing pipelines cannot be exported to .npz; drop a stale export so
+    # load_models does not prefer it over the new model
+    export_out = export_path_for(args.model_out)
+    if export_out.exists():
+        export_out.unlink()
+        print(f"⚠️ Removed stale NumPy export {export_out}")
+
+    save_index(counts, args.model_out, args.spans_csv)
+
+
 if __name__ == "__main__":
-    import argparse
     p = argparse.ArgumentParser()
     p.add_argument("--spans_csv", required=True)
     p.add_argument("--model_out", required=True)
+    p.add_argument("--incremental", action="store_true",
+                   help="stream spans into a hashing vectorizer + SGD classifier")
+    p.add_argument("--update", help="incremental classifier joblib to continue training with --spans_csv")
+    p.add_argument("--chunksize", type=int, default=50_000, help="spans read per chunk")
+    p.add_argument("--epochs", type=int, default=5, help="passes over the spans")
+    p.add_argument("--search", action="store_true", help="grid search hyperparameters before training")
+    p.add_argument("--search_sample", type=int, default=20_000, help="spans used for --search")
     args = p.parse_args()
-    main(args)
+    if args.incremental or args.update:
+        main_incremental(args)
+    else:
+        main(args)